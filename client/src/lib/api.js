@@ -40,7 +40,7 @@ export const stockApi = {
   // on cold workers, well past the default 20s axios timeout.
   news: (ticker, config) =>
     api.get(`/stock/${encodeURIComponent(ticker)}`, { timeout: 90000, ...(config || {}) }),
-  history: (ticker) => api.get(`/stock/${encodeURIComponent(ticker)}/history`),
+  history: (ticker, range) => api.get(`/stock/${encodeURIComponent(ticker)}/history`, range ? { params: { range } } : undefined),
   quote: (ticker) => api.get(`/stock/${encodeURIComponent(ticker)}/quote`),
   marketState: () => api.get('/api/market/state'),
   movers: (limit = 6) => api.get('/api/market/movers', { params: { limit } }),
@@ -52,5 +52,8 @@ export const portfolioApi = {
   get: () => api.get('/portfolio'),
   add: (payload) => api.post('/portfolio/add', payload),
   remove: (payload) => api.post('/portfolio/remove', payload),
+  import: (lots) => api.post('/portfolio/import', lots),
   history: () => api.get('/portfolio/history'),
+  sentiment: () => api.get('/portfolio/sentiment'),
+  analytics: (range) => api.get('/portfolio/analytics', range ? { params: { range } } : undefined),
 };
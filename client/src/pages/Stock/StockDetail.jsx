@@ -32,6 +32,23 @@ const STATE_LABELS = {
   closed: { label: 'Market closed', variant: 'neutral', icon: Moon,     live: false },
 };
 
+const NY_TIME = new Intl.DateTimeFormat('en-US', {
+  timeZone: 'America/New_York', hour: '2-digit', minute: '2-digit', hourCycle: 'h23',
+});
+
+// Columnar OHLCV bars ({ t, o, h, l, c, v }) → chart rows.
+function barsToHistory(bars) {
+  return (bars.t || []).map((ts, i) => ({
+    date: NY_TIME.format(new Date(ts * 1000)),
+    ts,
+    open: bars.o[i],
+    high: bars.h[i],
+    low: bars.l[i],
+    price: bars.c[i],
+    volume: bars.v[i],
+  }));
+}
+
 export default function StockDetail() {
   const { ticker: rawTicker } = useParams();
   const ticker = (rawTicker || '').toUpperCase();
@@ -84,7 +101,7 @@ export default function StockDetail() {
           setHistory(payload);
           setHistoryMeta(null);
         } else {
-          setHistory(payload.history || []);
+          setHistory(payload.bars ? barsToHistory(payload.bars) : payload.history || []);
           setHistoryMeta({
             market: payload.market || null,
             trading_day: payload.trading_day || null,
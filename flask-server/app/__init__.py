@@ -13,7 +13,8 @@ from .routes.home_routes import home_routes
 from .routes.auth import auth_routes
 from .routes.stock_routes import stock_routes
 from .routes.portfolio_routes import portfolio_routes
-from .security import install_security_headers, allowed_origins
+from .routes.stream_routes import stream_routes
+from .security import install_security_headers, allowed_origins, operator_only
 
 
 def _configure_logging():
@@ -36,6 +37,20 @@ def _prewarm_finbert():
         logger.warning("FinBERT pre-warm failed (will retry on first request): %s", exc)
 
 
+def _start_cache_snapshots():
+    """Restore caches from the last snapshot (lazily) and keep it current."""
+    from .ai.cache import last_good_cache, news_cache, report_cache, sentiment_cache, symbol_cache
+    from .cache_snapshot import snapshots
+    from .services import market_data
+    snapshots.register("news", news_cache)
+    snapshots.register("report", report_cache)
+    snapshots.register("sentiment", sentiment_cache)
+    snapshots.register("symbol", symbol_cache)
+    snapshots.register("lastgood", last_good_cache)
+    snapshots.register("market", market_data._cache)
+    snapshots.start()
+
+
 def create_app():
     _configure_logging()
     logger = logging.getLogger("tickr")
@@ -91,12 +106,34 @@ def create_app():
     app.register_blueprint(auth_routes)
     app.register_blueprint(stock_routes)
     app.register_blueprint(portfolio_routes)
+    app.register_blueprint(stream_routes)
 
     # ── Health check (used by load balancers / uptime monitors) ──
     @app.route("/healthz")
     def healthz():
         return jsonify({"status": "ok"}), 200
 
+    # ── Operational metrics (upstream latency histograms) ──
+    @app.route("/metrics")
+    @operator_only
+    def metrics():
+        from .ai.sources import http as upstream_http
+        from .cache_snapshot import snapshots
+        from .services import market_data
+        from .services.eod_store import eod_store
+        from .services.portfolio_history import portfolio_history
+        from .services.quote_broadcast import broadcaster
+        from .services.quote_stream import quote_stream
+        return jsonify({
+            "upstream": upstream_http.stats(),
+            "market_cache": market_data.cache_stats(),
+            "quote_stream": quote_stream.stats(),
+            "sse": broadcaster.stats(),
+            "cache_snapshot": snapshots.stats(),
+            "eod_store": eod_store.stats(),
+            "portfolio_history": portfolio_history.stats(),
+        }), 200
+
     # ── Unified error handler — never leak stack traces ──
     @app.errorhandler(Exception)
     def _on_error(err):
@@ -106,8 +143,24 @@ def create_app():
         logger.exception("Unhandled error: %s", err)
         return jsonify({"message": "Internal server error"}), 500
 
+    # Warm-start caches from the previous process's snapshot.
+    _start_cache_snapshots()
+
     # Pre-warm FinBERT in a background thread so it doesn't block boot but
     # is ready before the first /stock/<ticker> request lands.
     threading.Thread(target=_prewarm_finbert, name="finbert-warmup", daemon=True).start()
 
+    # One upstream trade stream per process feeds live quotes (no-op when
+    # QUOTE_STREAM=off or websocket-client isn't installed).
+    from .services.quote_stream import quote_stream
+    quote_stream.start()
+
+    # Daily end-of-day close backfill for every held ticker.
+    from .services.eod_store import eod_store
+    eod_store.start()
+
+    # Nightly portfolio valuation snapshots (after the EOD closes land).
+    from .services.portfolio_history import portfolio_history
+    portfolio_history.start()
+
     return app
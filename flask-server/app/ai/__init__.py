@@ -4,7 +4,7 @@ Sentivest AI pipeline.
 A clean, modular news-and-sentiment system designed for accuracy,
 explainability, and production-grade reliability.
 """
-from .pipeline import analyze_ticker
-from .symbols import search_symbols, get_company_name, list_trending
+from .pipeline import analyze_ticker, analyze_tickers
+from .symbols import search_symbols, get_company_name, local_company_names, list_trending
 
-__all__ = ["analyze_ticker", "search_symbols", "get_company_name", "list_trending"]
+__all__ = ["analyze_ticker", "analyze_tickers", "search_symbols", "get_company_name", "local_company_names", "list_trending"]
@@ -3,48 +3,118 @@ Tiny thread-safe TTL cache.
 
 Keeps news fetches and sentiment runs from re-hitting Finnhub/FinBERT
 on every page-load and dramatically reduces tail latency.
+
+Caches given a `namespace` also write through to the shared backend
+(CACHE_BACKEND — see app.cache_backends) and fall back to it on local
+misses, so every worker reuses one worker's work.
+
+Entries can also be restored from a boot snapshot (app.cache_snapshot);
+the snapshot section is decoded on first use, not at import.
 """
 import time
 import threading
 from typing import Any, Optional
 
+from ..cache_backends import shared_backend
+
 
 class TTLCache:
-    def __init__(self, ttl_seconds: int = 600, max_entries: int = 512):
+    def __init__(self, ttl_seconds: int = 600, max_entries: int = 512, namespace: Optional[str] = None):
         self._ttl = ttl_seconds
         self._max = max_entries
+        self._ns = namespace
         self._store: dict[str, tuple[float, Any]] = {}
         self._lock = threading.Lock()
+        self._warm_loader = None
+
+    def _shared(self):
+        return shared_backend() if self._ns else None
+
+    def _put_local(self, key: str, expiry: float, value: Any) -> None:
+        with self._lock:
+            if key not in self._store and len(self._store) >= self._max:
+                # Evict oldest by expiry — simple bounded eviction
+                oldest = min(self._store.items(), key=lambda kv: kv[1][0])
+                self._store.pop(oldest[0], None)
+            self._store[key] = (expiry, value)
+
+    # ── Warm start ──
+
+    def attach_warm(self, loader) -> None:
+        """`loader()` → [(key, expiry, value)], applied lazily on first use."""
+        self._warm_loader = loader
+
+    def _warm(self) -> None:
+        if self._warm_loader is None:
+            return
+        with self._lock:
+            loader, self._warm_loader = self._warm_loader, None
+        if loader is None:
+            return
+        now = time.time()
+        items = sorted((i for i in loader() if i[1] > now), key=lambda i: -i[1])
+        with self._lock:
+            for key, expiry, value in items:
+                if len(self._store) >= self._max:
+                    break
+                self._store.setdefault(key, (expiry, value))   # live writes win
+
+    def snapshot_items(self) -> list[tuple[str, float, Any]]:
+        self._warm()
+        now = time.time()
+        with self._lock:
+            return [(k, exp, v) for k, (exp, v) in self._store.items() if exp > now]
 
     def get(self, key: str) -> Optional[Any]:
+        self._warm()
         with self._lock:
             entry = self._store.get(key)
-            if not entry:
-                return None
-            expiry, value = entry
-            if expiry < time.time():
+            if entry:
+                expiry, value = entry
+                if expiry >= time.time():
+                    return value
                 self._store.pop(key, None)
-                return None
-            return value
+        shared = self._shared()
+        if shared is None:
+            return None
+        remote = shared.get(f"{self._ns}:{key}")
+        if not remote or remote[0] < time.time():
+            return None
+        self._put_local(key, remote[0], remote[1])
+        return remote[1]
 
     def set(self, key: str, value: Any) -> None:
+        expiry = time.time() + self._ttl
+        self._put_local(key, expiry, value)
+        shared = self._shared()
+        if shared is not None:
+            shared.set(f"{self._ns}:{key}", (expiry, value), self._ttl)
+
+    def delete(self, key: str) -> None:
+        self._warm()   # so a pending snapshot entry can't resurrect it
         with self._lock:
-            if len(self._store) >= self._max:
-                # Evict oldest by expiry — simple bounded eviction
-                oldest = min(self._store.items(), key=lambda kv: kv[1][0])
-                self._store.pop(oldest[0], None)
-            self._store[key] = (time.time() + self._ttl, value)
+            self._store.pop(key, None)
+        shared = self._shared()
+        if shared is not None:
+            shared.delete(f"{self._ns}:{key}")
 
     def clear(self) -> None:
         with self._lock:
+            self._warm_loader = None   # a pending snapshot must not refill it
             self._store.clear()
+        shared = self._shared()
+        if shared is not None:
+            shared.clear(f"{self._ns}:")
 
 
 # Public, per-purpose caches.
 # Sentiment is an expensive call (FinBERT on CPU). Caches are tuned for
 # "fresh enough that the headlines are still relevant, long enough that a
 # warm worker rarely re-pays the compute cost."
-news_cache = TTLCache(ttl_seconds=1800)     # raw news per ticker (30 min)
-report_cache = TTLCache(ttl_seconds=1800)   # full sentiment report (30 min)
-sentiment_cache = TTLCache(ttl_seconds=86400, max_entries=4096)  # per-text sentiment (1 day)
-symbol_cache = TTLCache(ttl_seconds=86400)  # ticker → company name (1 day)
+news_cache = TTLCache(ttl_seconds=1800, namespace="news")       # raw news per ticker (30 min)
+report_cache = TTLCache(ttl_seconds=1800, namespace="report")   # full sentiment report (30 min)
+sentiment_cache = TTLCache(ttl_seconds=86400, max_entries=4096, namespace="sentiment")  # per-text (1 day)
+symbol_cache = TTLCache(ttl_seconds=86400, namespace="symbol")  # ticker → company name (1 day)
+# Last known-good news + reports, served (flagged degraded) while the news
+# provider's breaker is open or it is failing. Long-lived on purpose.
+last_good_cache = TTLCache(ttl_seconds=7 * 86400, max_entries=1024, namespace="lastgood")
@@ -4,10 +4,20 @@ US equity market state — open / closed / pre / after.
 Uses zoneinfo (stdlib) so we don't pull in pytz. All decisions are made
 in America/New_York time. Holidays are an approximation good enough for
 display purposes; we don't trade off this code.
+
+`MarketCalendar` precomputes every session transition (pre → open →
+after → closed, with early closes) for a span of years into one sorted
+list, so "state at t" and "next transition after t" are a bisect
+instead of rebuilding the holiday set on every call. Caches use the
+latter to expire exactly at the open and close.
 """
 from __future__ import annotations
 
+import bisect
+import threading
+import time as _time
 from datetime import datetime, date, time, timedelta
+from typing import NamedTuple
 from zoneinfo import ZoneInfo
 
 NY = ZoneInfo("America/New_York")
@@ -18,6 +28,31 @@ _CLOSE = time(16, 0)
 # Extended hours surfaced as "Pre" / "After"
 _PRE_OPEN = time(4, 0)
 _AFTER_CLOSE = time(20, 0)
+# Half days (1pm close; extended hours end 5pm)
+_EARLY_CLOSE = time(13, 0)
+_EARLY_AFTER_CLOSE = time(17, 0)
+
+_LABELS = {
+    "open": "Market open",
+    "pre": "Pre-market",
+    "after": "After hours",
+    "closed": "Market closed",
+}
+
+
+def _easter(year: int) -> date:
+    """Western (Gregorian) Easter Sunday — anonymous Gregorian algorithm."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
 
 
 def _us_holidays(year: int) -> set[date]:
@@ -50,19 +85,152 @@ def _us_holidays(year: int) -> set[date]:
             return d + timedelta(days=1)
         return d
 
-    h.add(observed(date(year, 1, 1)))                 # New Year's Day
+    new_year = observed(date(year, 1, 1))
+    if new_year.year == year:                         # NYSE doesn't close Dec 31 for a Saturday New Year
+        h.add(new_year)                               # New Year's Day
     h.add(nth_weekday(1, 0, 3))                       # MLK day (3rd Mon Jan)
     h.add(nth_weekday(2, 0, 3))                       # Presidents Day (3rd Mon Feb)
+    h.add(_easter(year) - timedelta(days=2))          # Good Friday
     h.add(last_weekday(5, 0))                         # Memorial Day (last Mon May)
     h.add(observed(date(year, 6, 19)))                # Juneteenth
     h.add(observed(date(year, 7, 4)))                 # Independence Day
     h.add(nth_weekday(9, 0, 1))                       # Labor Day (1st Mon Sep)
     h.add(nth_weekday(11, 3, 4))                      # Thanksgiving (4th Thu Nov)
     h.add(observed(date(year, 12, 25)))               # Christmas
-    # Good Friday is hard without a Western Easter calculator; omitted intentionally.
     return h
 
 
+def _us_early_closes(year: int, holidays: set[date]) -> set[date]:
+    """1pm closes: July 3, the day after Thanksgiving, Christmas Eve."""
+    thanksgiving = next(d for d in holidays if d.month == 11)
+    candidates = [thanksgiving + timedelta(days=1), date(year, 12, 24)]
+    if date(year, 7, 4).weekday() not in (0, 5, 6):   # not when the 4th is a long weekend
+        candidates.append(date(year, 7, 3))
+    return {d for d in candidates if d.weekday() < 5 and d not in holidays}
+
+
+class _Table(NamedTuple):
+    first_year: int
+    last_year: int
+    holidays: frozenset
+    early: frozenset
+    ts: list           # transition epochs, sorted
+    states: list       # state entered at ts[i]
+    opens: list        # regular-open epoch per trading day
+    days: list         # trading days, parallel to opens
+
+
+class MarketCalendar:
+    """
+    Precomputed US equity session transitions.
+
+    The table's `ts` / `states` are parallel sorted lists: from `ts[i]`
+    until `ts[i + 1]` the market is in `states[i]`. Spans `years_back`
+    years before and `years_ahead` after the current one and widens
+    itself if asked about a time outside that span. A widened table is
+    built aside and published with one assignment, and every query reads
+    the table once, so nothing pairs arrays from two builds.
+    """
+
+    def __init__(self, years_back: int = 6, years_ahead: int = 2):
+        self._lock = threading.Lock()
+        this_year = datetime.now(NY).year
+        self._table = self._build(this_year - years_back, this_year + years_ahead)
+
+    @staticmethod
+    def _build(first_year: int, last_year: int) -> _Table:
+        ts: list[int] = []
+        states: list[str] = []
+        holidays: set[date] = set()
+        early: set[date] = set()
+        opens: list[int] = []
+        days: list[date] = []
+        for year in range(first_year, last_year + 1):
+            yh = _us_holidays(year)
+            holidays |= yh
+            early |= _us_early_closes(year, yh)
+        d = date(first_year, 1, 1)
+        end = date(last_year, 12, 31)
+        while d <= end:
+            if d.weekday() < 5 and d not in holidays:
+                half = d in early
+                for at, state in (
+                    (_PRE_OPEN, "pre"),
+                    (_OPEN, "open"),
+                    (_EARLY_CLOSE if half else _CLOSE, "after"),
+                    (_EARLY_AFTER_CLOSE if half else _AFTER_CLOSE, "closed"),
+                ):
+                    ts.append(int(datetime.combine(d, at, tzinfo=NY).timestamp()))
+                    states.append(state)
+                opens.append(ts[-3])
+                days.append(d)
+            d += timedelta(days=1)
+        return _Table(first_year, last_year, frozenset(holidays), frozenset(early), ts, states, opens, days)
+
+    def _cover(self, year: int) -> _Table:
+        """The current table, widened first if `year` isn't strictly inside it."""
+        tab = self._table
+        if tab.first_year < year < tab.last_year:
+            return tab   # strictly inside, so neighbouring transitions exist too
+        with self._lock:
+            tab = self._table
+            if not (tab.first_year < year < tab.last_year):
+                tab = self._table = self._build(min(tab.first_year, year - 1), max(tab.last_year, year + 1))
+            return tab
+
+    @staticmethod
+    def _epoch(at) -> float:
+        if at is None:
+            return _time.time()
+        if isinstance(at, datetime):
+            return (at if at.tzinfo else at.replace(tzinfo=NY)).timestamp()
+        return float(at)
+
+    # ── Queries (O(log n)) ──
+
+    def state_at(self, at=None) -> str:
+        t = self._epoch(at)
+        tab = self._cover(datetime.fromtimestamp(t, NY).year)
+        i = bisect.bisect_right(tab.ts, t) - 1
+        return tab.states[i] if i >= 0 else "closed"
+
+    def next_transition(self, at=None) -> tuple[int, str]:
+        """(epoch seconds, state entered) of the first transition after `at`."""
+        t = self._epoch(at)
+        tab = self._cover(datetime.fromtimestamp(t, NY).year)
+        i = bisect.bisect_right(tab.ts, t)
+        return tab.ts[i], tab.states[i]
+
+    def seconds_to_transition(self, at=None) -> float:
+        t = self._epoch(at)
+        return self.next_transition(t)[0] - t
+
+    def is_holiday(self, d: date) -> bool:
+        return d in self._cover(d.year).holidays
+
+    def is_early_close(self, d: date) -> bool:
+        return d in self._cover(d.year).early
+
+    def last_trading_day(self, at=None) -> date:
+        """Latest trading day whose regular open is at or before `at`."""
+        t = self._epoch(at)
+        tab = self._cover(datetime.fromtimestamp(t, NY).year)
+        return tab.days[bisect.bisect_right(tab.opens, t) - 1]
+
+    def trading_days(self, start: date, end: date) -> list[date]:
+        self._cover(start.year)
+        tab = self._cover(end.year)   # tables only widen, so this covers start too
+        lo = bisect.bisect_left(tab.days, start)
+        hi = bisect.bisect_right(tab.days, end)
+        return tab.days[lo:hi]
+
+    def session_close(self, d: date) -> time:
+        return _EARLY_CLOSE if self.is_early_close(d) else _CLOSE
+
+
+calendar = MarketCalendar()
+
+
 def now_ny() -> datetime:
     return datetime.now(NY)
 
@@ -73,7 +241,8 @@ def market_state(now: datetime | None = None) -> dict:
       {
         state: 'open' | 'pre' | 'after' | 'closed',
         label: human-readable,
-        next_open_ts: epoch seconds (UTC) when market next opens (closed/after-hours only)
+        next_transition_ts: epoch seconds (UTC) of the next state change,
+        early_close: today is a 1pm half day,
       }
     """
     if now is None:
@@ -84,44 +253,22 @@ def market_state(now: datetime | None = None) -> dict:
         now = now.astimezone(NY)
 
     today = now.date()
-    is_weekend = today.weekday() >= 5
-    is_holiday = today in _us_holidays(today.year)
-    t = now.time()
-
-    if is_weekend or is_holiday:
-        state, label = "closed", "Market closed"
-    elif _OPEN <= t < _CLOSE:
-        state, label = "open", "Market open"
-    elif _PRE_OPEN <= t < _OPEN:
-        state, label = "pre", "Pre-market"
-    elif _CLOSE <= t < _AFTER_CLOSE:
-        state, label = "after", "After hours"
-    else:
-        state, label = "closed", "Market closed"
-
+    state = calendar.state_at(now)
+    next_ts, _ = calendar.next_transition(now)
     return {
         "state": state,
-        "label": label,
+        "label": _LABELS[state],
         "ny_time": now.isoformat(),
-        "is_weekend": is_weekend,
-        "is_holiday": is_holiday,
+        "is_weekend": today.weekday() >= 5,
+        "is_holiday": calendar.is_holiday(today),
+        "early_close": calendar.is_early_close(today),
+        "next_transition_ts": next_ts,
     }
 
 
 def last_trading_day(now: datetime | None = None) -> date:
     """Most recent date the US market was (or is) open."""
-    if now is None:
-        now = now_ny()
-    d = now.date()
-    # If we're before today's open, last trading day is the previous one
-    if now.time() < _OPEN:
-        d -= timedelta(days=1)
-    holidays = _us_holidays(d.year)
-    while d.weekday() >= 5 or d in holidays:
-        d -= timedelta(days=1)
-        if d.year != now.year:
-            holidays = _us_holidays(d.year)
-    return d
+    return calendar.last_trading_day(now)
 
 
 def session_bounds(trading_day: date) -> tuple[int, int]:
@@ -130,6 +277,7 @@ def session_bounds(trading_day: date) -> tuple[int, int]:
     plus a small pre/post buffer so we capture extended-hours bars when the
     user views them.
     """
+    after = _EARLY_AFTER_CLOSE if calendar.is_early_close(trading_day) else _AFTER_CLOSE
     start_ny = datetime.combine(trading_day, _PRE_OPEN, tzinfo=NY)
-    end_ny = datetime.combine(trading_day, _AFTER_CLOSE, tzinfo=NY)
+    end_ny = datetime.combine(trading_day, after, tzinfo=NY)
     return int(start_ny.timestamp()), int(end_ny.timestamp())
@@ -66,6 +66,7 @@ class TickerReport:
     company: Optional[str]
     verdict: Verdict
     articles: list = field(default_factory=list)
+    degraded: bool = False     # served from last-known-good while upstream is down
 
     def to_dict(self) -> dict:
         return {
@@ -73,4 +74,5 @@ class TickerReport:
             "company": self.company,
             "verdict": asdict(self.verdict),
             "articles": [a.to_dict() for a in self.articles],
+            "degraded": self.degraded,
         }
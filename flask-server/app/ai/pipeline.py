@@ -1,19 +1,30 @@
 """
 End-to-end orchestrator.
 
-  fetch ──► relevance filter ──► sentiment classify ──► dedupe ──► score & rank
+  fetch (all sources) ──► relevance filter ──► sentiment classify ──► dedupe ──► score & rank
         ╰─► aggregate verdict ──► explain ──► cache ──► return
 
 Every stage is its own module so individual concerns can be evolved
 independently and tested in isolation.
+
+`analyze_tickers` runs the same stages for many tickers at once: fetches
+in parallel, then ONE fused classify_batch over every ticker's articles
+(FinBERT batches far better than N separate calls), then per-ticker
+finish. Work still running at the caller's deadline carries on in the
+background and lands in the report cache.
 """
 from __future__ import annotations
 
+import dataclasses
+import logging
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Optional
 
-from .cache import news_cache, report_cache
+import requests
+
+from .cache import last_good_cache, news_cache, report_cache
 from .dedupe import dedupe_articles
 from .explain import explain, top_drivers
 from .models import RawArticle, ScoredArticle, TickerReport, Verdict
@@ -22,7 +33,7 @@ from .relevance import relevance_score
 from .sentiment import (
     aggregate, article_impact, classify_batch, recency_weight,
 )
-from .sources import FinnhubSource
+from .sources import default_registry
 from .symbols import get_company_name
 
 # Defaults
@@ -36,25 +47,57 @@ _MAX_OUTPUT = 25
 # × recency) and drop the tail.
 _MAX_CLASSIFY = 40
 
+log = logging.getLogger("tickr.pipeline")
+
+# News fetches for multi-ticker requests. Classification has its own
+# small pool so it never queues behind slow fetches; two workers so a
+# request's fused batch isn't stuck behind one late-ticker backfill.
+_batch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sentiment-batch")
+_classify_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sentiment-classify")
+_FETCH_SHARE = 0.6
 
-def _fetch_raw(ticker: str, days: int) -> list[RawArticle]:
+
+def _fetch_raw(ticker: str, days: int) -> tuple[list[RawArticle], bool]:
+    """(articles, complete). Incomplete = the primary source failed and
+    only backups answered; that set is neither cached nor kept as last good."""
     key = f"raw::{ticker.upper()}::{days}"
     cached = news_cache.get(key)
     if cached is not None:
-        return cached
-    src = FinnhubSource()
-    items = src.fetch(ticker, days=days)
-    news_cache.set(key, items)
-    return items
+        return cached, True
+    items, complete = default_registry().fetch_all(ticker, days=days)
+    if complete:
+        news_cache.set(key, items)
+        last_good_cache.set(key, items)
+    return items, complete
+
+
+def _degradable(exc: requests.RequestException) -> bool:
+    """
+    Upstream failures worth papering over with last-known-good data.
+    Auth/config errors (401/403/404) are not — they need to surface.
+    """
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return True
 
 
-def _classify_articles(raws: list[RawArticle]) -> list[dict]:
-    # Combine headline + summary for richer classification context.
-    texts = [
-        (r.headline or "") + (". " + r.summary if r.summary else "")
-        for r in raws
-    ]
-    return classify_batch(texts)
+@dataclasses.dataclass
+class _Staged:
+    """A ticker fetched and filtered, waiting on sentiment classification."""
+    ticker: str
+    company: Optional[str]
+    cache_key: str
+    now: int
+    picked: list            # [(RawArticle, relevance)]
+    degraded: bool = False
+
+    def texts(self) -> list[str]:
+        # Combine headline + summary for richer classification context.
+        return [
+            (r.headline or "") + (". " + r.summary if r.summary else "")
+            for r, _ in self.picked
+        ]
 
 
 def analyze_ticker(
@@ -67,10 +110,29 @@ def analyze_ticker(
     """
     Build a full sentiment report for one ticker.
 
+    When the news provider is failing, returns the last known-good
+    report (or one rebuilt from the last good news set) with
+    `degraded=True` instead of waiting on it.
+
     Raises:
         RuntimeError if FINNHUB_API_KEY is not configured.
-        requests.HTTPError on upstream failures (404, 429, etc.) so the
-        route layer can map them to clean status codes.
+        requests.HTTPError on upstream failures (404, 429, etc.) with no
+        last-known-good data, so the route layer can map them to clean
+        status codes.
+    """
+    staged = _prepare(ticker, days, min_relevance, company)
+    if isinstance(staged, TickerReport):
+        return staged
+    return _finish(staged, classify_batch(staged.texts()), max_output)
+
+
+def _prepare(
+    ticker: str, days: int, min_relevance: float, company: Optional[str],
+) -> TickerReport | _Staged:
+    """
+    Stages 0-2: cached report, or fetched + relevance-filtered articles
+    ready to classify. Returns a finished report when there's nothing to
+    classify (cache hit, degraded last-good report, no news).
     """
     ticker = ticker.upper().strip()
     now = int(time.time())
@@ -83,8 +145,33 @@ def analyze_ticker(
     # 0. Resolve company name (used for relevance + explanations)
     company = company or get_company_name(ticker)
 
-    # 1. Fetch
-    raws = _fetch_raw(ticker, days)
+    # 1. Fetch. If the provider is down (breaker open, 5xx, timeouts,
+    # budget exhausted) answer from the last good report, or rebuild from
+    # the last good news set, flagged degraded — never block on it.
+    degraded = False
+    try:
+        raws, complete = _fetch_raw(ticker, days)
+    except requests.RequestException as exc:
+        if not _degradable(exc):
+            raise
+        last_report = last_good_cache.get(cache_key)
+        if last_report is not None:
+            log.warning("News fetch failed for %s (%s); serving last good report", ticker, exc)
+            return dataclasses.replace(last_report, degraded=True)
+        raws = last_good_cache.get(f"raw::{ticker}::{days}")
+        if raws is None:
+            raise
+        log.warning("News fetch failed for %s (%s); rebuilding from last good news", ticker, exc)
+        degraded = True
+    else:
+        if not complete:
+            # Only backup sources answered — a fuller last good report
+            # beats a fixture-sized one; either way it's degraded.
+            last_report = last_good_cache.get(cache_key)
+            if last_report is not None:
+                log.warning("Primary news source failed for %s; serving last good report", ticker)
+                return dataclasses.replace(last_report, degraded=True)
+            degraded = True
     if not raws:
         return _empty_report(ticker, company, now)
 
@@ -113,12 +200,16 @@ def analyze_ticker(
         )
         pre = pre[:_MAX_CLASSIFY]
 
-    # 3. Sentiment classify
-    sentiments = _classify_articles([r for r, _ in pre])
+    return _Staged(ticker, company, cache_key, now, pre, degraded)
+
+
+def _finish(staged: _Staged, sentiments: list[dict], max_output: int = _MAX_OUTPUT) -> TickerReport:
+    """Stages 4-8 once sentiments are in: weigh, dedupe, rank, aggregate, explain, cache."""
+    ticker, company, now = staged.ticker, staged.company, staged.now
 
     # 4. Build ScoredArticles with weights
     scored: list[ScoredArticle] = []
-    for (raw, rel), sent in zip(pre, sentiments):
+    for (raw, rel), sent in zip(staged.picked, sentiments):
         sw = source_weight(raw.source)
         rec = recency_weight(raw.published_at, now=now)
         impact = article_impact(
@@ -181,11 +272,113 @@ def analyze_ticker(
         as_of=now,
     )
 
-    report = TickerReport(ticker=ticker, company=company, verdict=verdict, articles=scored)
-    report_cache.set(cache_key, report)
+    report = TickerReport(
+        ticker=ticker, company=company, verdict=verdict, articles=scored, degraded=staged.degraded,
+    )
+    if not staged.degraded:
+        report_cache.set(staged.cache_key, report)
+        last_good_cache.set(staged.cache_key, report)
     return report
 
 
+# ────── Many tickers ────────────────────────────────────────────────────
+
+def analyze_tickers(
+    tickers: list[str],
+    days: int = _WINDOW_DAYS,
+    timeout: Optional[float] = None,
+    companies: Optional[dict] = None,
+) -> tuple[dict[str, TickerReport], list[str], dict[str, Exception]]:
+    """
+    Reports for many tickers → (reports, pending, errors).
+
+    Cached reports are returned as-is; the rest are fetched concurrently
+    and classified together in one batch. Tickers not finished within
+    `timeout` seconds are listed in `pending` — their work continues in
+    the background and the next call finds them cached.
+    """
+    start = time.monotonic()
+    companies = companies or {}
+    tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t))
+
+    def remaining(share: float = 1.0):
+        return None if timeout is None else max(0.0, start + timeout * share - time.monotonic())
+
+    reports: dict[str, TickerReport] = {}
+    errors: dict[str, Exception] = {}
+    # Cache hits are answered here so they never queue behind slow fetches.
+    for t in tickers:
+        cached = report_cache.get(f"report::{t}::{days}")
+        if cached is not None:
+            reports[t] = cached
+    futures = {
+        _batch_pool.submit(_prepare, t, days, _MIN_RELEVANCE, companies.get(t)): t
+        for t in tickers if t not in reports
+    }
+    # Stop waiting on slow fetches early enough to leave the rest of the
+    # budget for classifying the ones that made it.
+    done, late = wait(futures, timeout=remaining(_FETCH_SHARE))
+
+    staged: list[_Staged] = []
+    for fut in done:
+        t = futures[fut]
+        try:
+            result = fut.result()
+        except Exception as exc:  # noqa: BLE001 — reported per ticker
+            errors[t] = exc
+            continue
+        if isinstance(result, TickerReport):
+            reports[t] = result
+        else:
+            staged.append(result)
+
+    # Fetches that miss the deadline get classified on their own when
+    # they land, so the next request is served from cache.
+    for fut in late:
+        fut.add_done_callback(_schedule_late)
+
+    pending = [futures[f] for f in late]
+    if staged:
+        fused = _classify_pool.submit(_classify_fused, staged)
+        try:
+            reports.update(fused.result(timeout=remaining()))
+        except TimeoutError:
+            pending.extend(s.ticker for s in staged)
+        except Exception as exc:  # noqa: BLE001
+            log.exception("Fused sentiment batch failed")
+            errors.update({s.ticker: exc for s in staged})
+    return reports, sorted(pending), errors
+
+
+def _classify_fused(staged: list[_Staged]) -> dict[str, TickerReport]:
+    """One classify_batch over every staged ticker's texts, split back per ticker."""
+    texts, bounds = [], []
+    for s in staged:
+        lo = len(texts)
+        texts.extend(s.texts())
+        bounds.append((lo, len(texts)))
+    sentiments = classify_batch(texts)
+    return {s.ticker: _finish(s, sentiments[lo:hi]) for s, (lo, hi) in zip(staged, bounds)}
+
+
+def _schedule_late(fut) -> None:
+    # Done-callbacks run on whichever thread completed the fetch; keep
+    # FinBERT off it and queue the finish as its own job.
+    try:
+        _classify_pool.submit(_finish_late, fut)
+    except RuntimeError:   # interpreter shutting down
+        pass
+
+
+def _finish_late(fut) -> None:
+    try:
+        result = fut.result()
+        if isinstance(result, _Staged):
+            _finish(result, classify_batch(result.texts()))
+    except Exception:  # noqa: BLE001 — best effort cache fill
+        log.warning("Background sentiment for a late ticker failed", exc_info=True)
+
+
 def _empty_report(ticker: str, company: Optional[str], now: int) -> TickerReport:
     verdict = Verdict(
         label="neutral",
@@ -176,6 +176,22 @@ def article_impact(*, source_weight: float, recency: float, relevance: float, co
     return max(0.0, min(1.0, source_weight * recency * relevance * (0.5 + 0.5 * confidence)))
 
 
+def verdict_label(score: float, distribution: dict) -> str:
+    """
+    Label with hysteresis: require ≥0.15 magnitude to declare bull/bear,
+    AND clear dominance in the distribution. Otherwise neutral, with
+    "mixed" reserved for cases where bull and bear are both ≥ 0.30.
+    """
+    bull, bear = distribution.get("bullish", 0.0), distribution.get("bearish", 0.0)
+    if bull >= 0.30 and bear >= 0.30 and abs(score) < 0.20:
+        return "mixed"
+    if score >= 0.15 and bull > bear:
+        return "bullish"
+    if score <= -0.15 and bear > bull:
+        return "bearish"
+    return "neutral"
+
+
 def aggregate(scored_articles: list, now: Optional[int] = None) -> dict:
     """
     Aggregate signed sentiment across articles, weighted by impact.
@@ -221,18 +237,8 @@ def aggregate(scored_articles: list, now: Optional[int] = None) -> dict:
     for k in weighted_dist:
         weighted_dist[k] /= total_w
 
-    # Label with hysteresis: require ≥0.15 magnitude to declare bull/bear,
-    # AND clear dominance in the distribution. Otherwise neutral, with
-    # "mixed" reserved for cases where bull and bear are both ≥ 0.30.
+    label = verdict_label(overall_score, weighted_dist)
     bull, bear, neu = weighted_dist["bullish"], weighted_dist["bearish"], weighted_dist["neutral"]
-    if bull >= 0.30 and bear >= 0.30 and abs(overall_score) < 0.20:
-        label = "mixed"
-    elif overall_score >= 0.15 and bull > bear:
-        label = "bullish"
-    elif overall_score <= -0.15 and bear > bull:
-        label = "bearish"
-    else:
-        label = "neutral"
 
     # Confidence reflects (a) how concentrated the distribution is and
     # (b) how much corroborating evidence we have. Bounded in [0, 1].
@@ -249,3 +255,37 @@ def aggregate(scored_articles: list, now: Optional[int] = None) -> dict:
         "distribution": {k: float(v) for k, v in weighted_dist.items()},
         "momentum": float(momentum),
     }
+
+
+def combine_verdicts(weighted: list[tuple[float, object]]) -> dict:
+    """
+    Roll per-ticker `Verdict`s up into one, weighted by e.g. market value.
+    Same shape and labelling rule as `aggregate`.
+    """
+    total_w = sum(w for w, _ in weighted if w > 0)
+    if total_w <= 0:
+        return {
+            "label": "neutral",
+            "score": 0.0,
+            "confidence": 0.0,
+            "distribution": {"bullish": 0.0, "neutral": 1.0, "bearish": 0.0},
+            "momentum": 0.0,
+        }
+    score = confidence = momentum = 0.0
+    dist = {"bullish": 0.0, "neutral": 0.0, "bearish": 0.0}
+    for w, v in weighted:
+        if w <= 0:
+            continue
+        share = w / total_w
+        score += v.score * share
+        confidence += v.confidence * share
+        momentum += v.momentum * share
+        for k in dist:
+            dist[k] += v.distribution.get(k, 0.0) * share
+    return {
+        "label": verdict_label(score, dist),
+        "score": float(score),
+        "confidence": float(confidence),
+        "distribution": {k: float(x) for k, x in dist.items()},
+        "momentum": float(momentum),
+    }
@@ -1,4 +1,9 @@
 from .base import NewsSource
 from .finnhub import FinnhubSource
+from .local import LocalFileSource
+from .registry import SourceRegistry, SourceSpec, default_registry
 
-__all__ = ["NewsSource", "FinnhubSource"]
+__all__ = [
+    "NewsSource", "FinnhubSource", "LocalFileSource",
+    "SourceRegistry", "SourceSpec", "default_registry",
+]
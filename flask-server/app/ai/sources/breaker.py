@@ -0,0 +1,157 @@
+"""
+Per-endpoint circuit breakers for upstream calls.
+
+When Finnhub is slow or erroring, waiting out an 8s timeout on every
+request just piles threads up behind it. Each endpoint gets a breaker
+that watches a rolling window of outcomes:
+
+  closed     — calls flow; trips open when the window holds at least
+               `min_calls` and either the error rate or the slow-call
+               rate crosses its threshold
+  open       — calls fail immediately with `CircuitOpen` for `cooldown`
+  half-open  — one probe call at a time; success closes, failure re-opens
+
+429s are not failures here — the rate budget owns those.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_WINDOW_S = 30.0
+_MIN_CALLS = 5
+_ERROR_RATE = 0.5
+_SLOW_RATE = 0.5
+_SLOW_MS = float(os.environ.get("FINNHUB_SLOW_MS", "4000"))
+_COOLDOWN_S = float(os.environ.get("FINNHUB_BREAKER_COOLDOWN", "20"))
+
+
+class CircuitOpen(requests.RequestException):
+    """The endpoint's breaker is open — the call was not attempted."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: float = _WINDOW_S,
+        min_calls: int = _MIN_CALLS,
+        error_rate: float = _ERROR_RATE,
+        slow_rate: float = _SLOW_RATE,
+        slow_ms: float = _SLOW_MS,
+        cooldown: float = _COOLDOWN_S,
+    ):
+        self.name = name
+        self._window = window
+        self._min_calls = min_calls
+        self._error_rate = error_rate
+        self._slow_rate = slow_rate
+        self._slow_ms = slow_ms
+        self._cooldown = cooldown
+        self._outcomes: deque[tuple[float, bool, bool]] = deque()  # (ts, failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._trips = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self._window
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def before(self) -> None:
+        """Gate a call. Raises CircuitOpen instead of letting it through."""
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self._cooldown:
+                    self._rejected += 1
+                    raise CircuitOpen(f"Circuit open for {self.name}")
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    self._rejected += 1
+                    raise CircuitOpen(f"Circuit half-open for {self.name}; probe in flight")
+                self._probing = True
+
+    def cancel(self) -> None:
+        """Release a half-open probe slot for a call that never went out."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+
+    def record(self, failed: bool, elapsed_ms: float) -> None:
+        now = time.monotonic()
+        slow = elapsed_ms >= self._slow_ms
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+                if failed or slow:
+                    self._trip(now)
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append((now, failed, slow))
+            self._trim(now)
+            n = len(self._outcomes)
+            if self._state != CLOSED or n < self._min_calls:
+                return
+            failures = sum(1 for _, f, _ in self._outcomes if f)
+            slows = sum(1 for _, _, s in self._outcomes if s)
+            if failures / n >= self._error_rate or slows / n >= self._slow_rate:
+                self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._trips += 1
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._state == OPEN and time.monotonic() - self._opened_at < self._cooldown
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._trim(time.monotonic())
+            n = len(self._outcomes)
+            return {
+                "state": self._state,
+                "window_calls": n,
+                "window_failures": sum(1 for _, f, _ in self._outcomes if f),
+                "window_slow": sum(1 for _, _, s in self._outcomes if s),
+                "trips": self._trips,
+                "rejected": self._rejected,
+            }
+
+
+class BreakerRegistry:
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(endpoint, CircuitBreaker(endpoint))
+        return breaker
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = list(self._breakers.items())
+        return {name: b.stats() for name, b in sorted(items)}
+
+
+breakers = BreakerRegistry()
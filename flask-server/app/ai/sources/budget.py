@@ -0,0 +1,177 @@
+"""
+Process-wide upstream rate budget for Finnhub.
+
+The free tier allows a fixed number of calls per minute across *every*
+endpoint, so news, quotes, candles, profiles, search, movers and
+portfolio pricing all draw from one token bucket here.
+
+Calls carry a priority class:
+
+  interactive  — a user is waiting on this exact response
+  background   — stale-while-revalidate refreshes, movers, shared views
+  prefetch     — warmers and backfills that can always wait
+
+Lower classes must leave a reserve of tokens in the bucket and yield to
+any higher-class caller already queued, so a movers refresh can't starve
+the quote a user just asked for. A reserve is capped below the bucket
+size so every class can still get a token; with a burst of 1 there is no
+reserve and only the yielding applies. Callers queue up to a per-class
+deadline and then fail fast with `BudgetExhausted`.
+
+429 responses pause the bucket for Retry-After seconds and halve the
+refill rate; successful calls creep it back up (AIMD).
+"""
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PREFETCH = "prefetch"
+
+_ORDER = (INTERACTIVE, BACKGROUND, PREFETCH)
+
+# Share of bucket capacity each class must leave untouched.
+_RESERVE = {INTERACTIVE: 0.0, BACKGROUND: 0.25, PREFETCH: 0.5}
+# How long each class may queue for a token before giving up (seconds).
+_MAX_WAIT = {INTERACTIVE: 3.0, BACKGROUND: 10.0, PREFETCH: 30.0}
+
+_CALLS_PER_MIN = int(os.environ.get("FINNHUB_CALLS_PER_MIN", "60"))
+_BURST = max(1, int(os.environ.get("FINNHUB_BURST", str(max(1, min(30, _CALLS_PER_MIN // 2))))))
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "finnhub_priority", default=INTERACTIVE,
+)
+
+
+class BudgetExhausted(requests.RequestException):
+    """No upstream token became available before the caller's deadline."""
+
+
+@contextmanager
+def priority(cls: str):
+    """Run the enclosed upstream calls under priority class `cls`."""
+    token = _priority.set(cls)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class RateBudget:
+    def __init__(self, per_minute: int = _CALLS_PER_MIN, burst: int = _BURST):
+        self._base_rate = per_minute / 60.0
+        self._rate = self._base_rate
+        self._min_rate = self._base_rate / 8
+        self._capacity = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._waiting = {cls: 0 for cls in _ORDER}
+        self._granted = {cls: 0 for cls in _ORDER}
+        self._rejected = {cls: 0 for cls in _ORDER}
+        self._throttled = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+            self._updated = now
+
+    def _outranked(self, cls: str) -> bool:
+        for other in _ORDER:
+            if other == cls:
+                return False
+            if self._waiting[other]:
+                return True
+        return False
+
+    def _floor(self, cls: str) -> float:
+        """Tokens class `cls` must leave behind — always below capacity - 1
+        or the class could never be served."""
+        if self._capacity <= 1:
+            return 0.0
+        return min(_RESERVE[cls] * self._capacity, self._capacity - 1)
+
+    def acquire(self, cls: str | None = None, timeout: float | None = None) -> None:
+        """
+        Take one token, queueing up to `timeout` seconds (defaults per
+        class). Raises BudgetExhausted when the deadline passes.
+        """
+        cls = cls or current_priority()
+        if cls not in _RESERVE:
+            cls = INTERACTIVE
+        deadline = time.monotonic() + (_MAX_WAIT[cls] if timeout is None else timeout)
+        floor = self._floor(cls)
+
+        with self._cond:
+            self._waiting[cls] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if (
+                        now >= self._paused_until
+                        and self._tokens - 1 >= floor
+                        and not self._outranked(cls)
+                    ):
+                        self._tokens -= 1
+                        self._granted[cls] += 1
+                        return
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._rejected[cls] += 1
+                        raise BudgetExhausted(f"Finnhub rate budget exhausted ({cls})")
+                    next_token = (floor + 1 - self._tokens) / self._rate
+                    pause = self._paused_until - now
+                    self._cond.wait(min(remaining, max(0.01, next_token, pause)))
+            finally:
+                self._waiting[cls] -= 1
+                self._cond.notify_all()
+
+    def observe(self, resp: requests.Response) -> None:
+        """Feed an upstream response back so 429s slow the bucket down."""
+        with self._cond:
+            if resp.status_code == 429:
+                self._throttled += 1
+                try:
+                    retry_after = float(resp.headers.get("Retry-After", ""))
+                except ValueError:
+                    retry_after = 0.0
+                # Finnhub often omits Retry-After; one bucket slot is a safe guess.
+                retry_after = retry_after if retry_after > 0 else 1.0 / self._rate
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                self._rate = max(self._min_rate, self._rate / 2)
+                self._tokens = 0.0
+            elif resp.status_code < 400 and self._rate < self._base_rate:
+                self._rate = min(self._base_rate, self._rate + self._base_rate / 60)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "calls_per_min": round(self._rate * 60, 2),
+                "base_calls_per_min": round(self._base_rate * 60, 2),
+                "tokens": round(self._tokens, 2),
+                "capacity": self._capacity,
+                "paused_for": max(0.0, round(self._paused_until - time.monotonic(), 2)),
+                "waiting": dict(self._waiting),
+                "granted": dict(self._granted),
+                "rejected": dict(self._rejected),
+                "throttled": self._throttled,
+            }
+
+
+budget = RateBudget()
@@ -1,25 +1,23 @@
 """
 Finnhub adapter — news, quotes, profiles, intraday candles.
+
+All calls go through the shared pooled client in `.http`.
 """
 from __future__ import annotations
 
-import os
 from datetime import date, timedelta
 
 import requests
 
 from ..models import RawArticle
 from .base import NewsSource
+from .http import _api_key, client
 
-_BASE = "https://finnhub.io/api/v1/company-news"
-_PROFILE = "https://finnhub.io/api/v1/stock/profile2"
-_SEARCH = "https://finnhub.io/api/v1/search"
-_QUOTE = "https://finnhub.io/api/v1/quote"
-_CANDLE = "https://finnhub.io/api/v1/stock/candle"
-
-
-def _api_key() -> str | None:
-    return os.environ.get("FINNHUB_API_KEY") or None
+_NEWS = "company-news"
+_PROFILE = "stock/profile2"
+_SEARCH = "search"
+_QUOTE = "quote"
+_CANDLE = "stock/candle"
 
 
 class FinnhubSource(NewsSource):
@@ -29,8 +27,7 @@ class FinnhubSource(NewsSource):
         self.timeout = timeout
 
     def fetch(self, ticker: str, days: int = 7) -> list[RawArticle]:
-        api_key = _api_key()
-        if not api_key:
+        if not _api_key():
             raise RuntimeError("FINNHUB_API_KEY not configured")
 
         range_to = date.today()
@@ -40,9 +37,8 @@ class FinnhubSource(NewsSource):
             "symbol": ticker.upper(),
             "from": range_from.strftime("%Y-%m-%d"),
             "to": range_to.strftime("%Y-%m-%d"),
-            "token": api_key,
         }
-        r = requests.get(_BASE, params=params, headers={"Accept-Encoding": "identity"}, timeout=self.timeout)
+        r = client.get(_NEWS, params=params, timeout=self.timeout)
         r.raise_for_status()
         items = r.json() or []
 
@@ -65,12 +61,10 @@ class FinnhubSource(NewsSource):
 
     @staticmethod
     def company_profile(ticker: str, timeout: int = 5) -> dict | None:
-        key = _api_key()
-        if not key:
+        if not _api_key():
             return None
         try:
-            r = requests.get(_PROFILE, params={"symbol": ticker, "token": key},
-                             headers={"Accept-Encoding": "identity"}, timeout=timeout)
+            r = client.get(_PROFILE, params={"symbol": ticker}, timeout=timeout)
             if r.status_code != 200:
                 return None
             data = r.json() or {}
@@ -80,12 +74,10 @@ class FinnhubSource(NewsSource):
 
     @staticmethod
     def quote(ticker: str, timeout: int = 5) -> dict | None:
-        key = _api_key()
-        if not key:
+        if not _api_key():
             return None
         try:
-            r = requests.get(_QUOTE, params={"symbol": ticker, "token": key},
-                             headers={"Accept-Encoding": "identity"}, timeout=timeout)
+            r = client.get(_QUOTE, params={"symbol": ticker}, timeout=timeout)
             if r.status_code != 200:
                 return None
             data = r.json() or None
@@ -97,25 +89,28 @@ class FinnhubSource(NewsSource):
             return None
 
     @staticmethod
-    def candles(ticker: str, resolution: str, from_ts: int, to_ts: int, timeout: int = 8) -> dict | None:
+    def candles(ticker: str, resolution: str, from_ts: int, to_ts: int, timeout: int = 8,
+                no_data: dict | None = None) -> dict | None:
         """
         Intraday/daily candles. `resolution` is one of 1, 5, 15, 30, 60, D, W, M.
         Returns the raw Finnhub payload {s, t, o, h, l, c, v} or None.
+        `no_data` is returned instead of None when Finnhub answers that the
+        span has no bars, for callers that must tell that from a failure.
         """
-        key = _api_key()
-        if not key:
+        if not _api_key():
             return None
         try:
-            r = requests.get(_CANDLE, params={
+            r = client.get(_CANDLE, params={
                 "symbol": ticker,
                 "resolution": resolution,
                 "from": from_ts,
                 "to": to_ts,
-                "token": key,
-            }, headers={"Accept-Encoding": "identity"}, timeout=timeout)
+            }, timeout=timeout)
             if r.status_code != 200:
                 return None
             data = r.json() or {}
+            if data.get("s") == "no_data":
+                return no_data
             if data.get("s") != "ok" or not data.get("t"):
                 return None
             return data
@@ -124,12 +119,10 @@ class FinnhubSource(NewsSource):
 
     @staticmethod
     def symbol_search(query: str, timeout: int = 5) -> list[dict]:
-        key = _api_key()
-        if not key:
+        if not _api_key():
             return []
         try:
-            r = requests.get(_SEARCH, params={"q": query, "token": key},
-                             headers={"Accept-Encoding": "identity"}, timeout=timeout)
+            r = client.get(_SEARCH, params={"q": query}, timeout=timeout)
             if r.status_code != 200:
                 return []
             data = r.json() or {}
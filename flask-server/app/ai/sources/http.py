@@ -0,0 +1,240 @@
+"""
+Shared, pooled HTTP client for every Finnhub call.
+
+One `requests.Session` per process so calls reuse keep-alive TCP+TLS
+connections instead of paying a fresh handshake each time. The pool is
+sized for gunicorn's thread count plus the service-layer fan-out, bodies
+are negotiated gzip, and timeout/retry policy lives in one place.
+
+`FINNHUB_BASE_URL` points the client somewhere other than finnhub.io —
+typically the local stand-in (`flask-server/finnhub_standin.py`). With
+`FINNHUB_RECORD_DIR` set, every successful JSON response is also written
+to disk in the stand-in's fixture layout so it can be replayed offline.
+
+Every call passes the endpoint's circuit breaker (see `.breaker`), takes
+a token from the shared rate budget (see `.budget`), and is timed into a
+per-endpoint latency histogram; `stats()` feeds the /metrics route.
+Retries happen here too, one attempt at a time through the same breaker
+and budget — never inside urllib3, where they'd be invisible to both.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .breaker import CircuitOpen, breakers
+from .budget import BudgetExhausted, budget
+
+_BASE_URL = os.environ.get("FINNHUB_BASE_URL") or "https://finnhub.io/api/v1"
+_RECORD_DIR = os.environ.get("FINNHUB_RECORD_DIR") or ""
+
+log = logging.getLogger("tickr.upstream")
+
+# gunicorn runs 4 threads per worker; the market-data fan-out adds up to 6
+# more. Anything beyond the pool size would open throwaway connections.
+_POOL_SIZE = int(os.environ.get("FINNHUB_POOL_SIZE", "16"))
+
+# Connection resets and transient 5xx get this many extra attempts. 429
+# is returned to the caller untouched — retrying it just burns budget.
+_RETRIES = 1
+_RETRY_STATUS = (502, 503, 504)
+_RETRY_BACKOFF_S = 0.25
+
+# Latency histogram bucket upper bounds (ms). The last bucket is open-ended.
+_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _api_key() -> str | None:
+    return os.environ.get("FINNHUB_API_KEY") or None
+
+
+def fixture_path(root: str, endpoint: str, params: dict | None) -> str:
+    """
+    Fixture file for one call: <root>/<endpoint with / → _>/<name>.json,
+    where <name> is the symbol (plus resolution for candles) or the
+    search query. The stand-in server reads the same layout.
+    """
+    params = params or {}
+    name = str(params.get("symbol") or params.get("q") or "_").upper()
+    if params.get("resolution"):
+        name = f"{name}_{params['resolution']}"
+    safe = "".join(ch if ch.isalnum() or ch in "._-" else "_" for ch in name)
+    return os.path.join(root, endpoint.replace("/", "_"), f"{safe}.json")
+
+
+def _record(endpoint: str, params: dict | None, resp: requests.Response) -> None:
+    try:
+        payload = resp.json()
+        path = fixture_path(_RECORD_DIR, endpoint, params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+    except (ValueError, OSError) as exc:
+        log.warning("Could not record %s fixture: %s", endpoint, exc)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram. Cheap enough to record every call."""
+
+    def __init__(self, bounds: tuple = _BUCKETS_MS):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum_ms = 0.0
+        self._errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms: float, ok: bool = True) -> None:
+        idx = bisect.bisect_left(self._bounds, elapsed_ms)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum_ms += elapsed_ms
+            if not ok:
+                self._errors += 1
+
+    def _quantile(self, q: float, total: int) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation."""
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(self._counts):
+            seen += n
+            if seen >= rank:
+                return float(self._bounds[i]) if i < len(self._bounds) else None
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = sum(self._counts)
+            labels = [f"le_{b}" for b in self._bounds] + ["le_inf"]
+            return {
+                "count": total,
+                "errors": self._errors,
+                "mean_ms": round(self._sum_ms / total, 2) if total else None,
+                "p50_ms": self._quantile(0.50, total),
+                "p95_ms": self._quantile(0.95, total),
+                "p99_ms": self._quantile(0.99, total),
+                "buckets": dict(zip(labels, self._counts)),
+            }
+
+
+class FinnhubClient:
+    """
+    Thin wrapper over a pooled session. Endpoints are passed as paths
+    relative to the API root (`quote`, `stock/candle`, …) so the same
+    name keys the latency histogram.
+    """
+
+    def __init__(self, base_url: str = _BASE_URL, pool_size: int = _POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self._session = requests.Session()
+        # No transport-level retries: `get` retries through the breaker and
+        # budget so every upstream request is counted.
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            max_retries=0,
+            pool_block=False,
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._hist_lock = threading.Lock()
+
+    def _histogram(self, endpoint: str) -> LatencyHistogram:
+        hist = self._histograms.get(endpoint)
+        if hist is None:
+            with self._hist_lock:
+                hist = self._histograms.setdefault(endpoint, LatencyHistogram())
+        return hist
+
+    def get(self, endpoint: str, params: dict | None = None, timeout: float = 5) -> requests.Response:
+        """
+        GET `endpoint` with the API key sent as a header (keeps it out of
+        URLs and access logs). Raises requests.RequestException on network
+        failure, when the endpoint's breaker is open (`breaker.CircuitOpen`)
+        or when no rate-budget token is available in time
+        (`budget.BudgetExhausted`); HTTP error statuses are returned for
+        the caller to map.
+
+        Connection errors and 502/503/504 are retried up to `_RETRIES`
+        times; each retry is a full attempt (breaker, budget, histogram).
+        If a retry can't get past the breaker or budget, the previous
+        attempt's outcome is returned.
+        """
+        for attempt in range(_RETRIES + 1):
+            if attempt:
+                time.sleep(_RETRY_BACKOFF_S * attempt)
+            try:
+                resp = self._attempt(endpoint, params, timeout)
+            except (CircuitOpen, BudgetExhausted):
+                if attempt == 0:
+                    raise
+                break  # retry refused — report what the last attempt saw
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if attempt == _RETRIES:
+                    raise
+                outcome = exc
+                continue
+            if resp.status_code not in _RETRY_STATUS or attempt == _RETRIES:
+                return resp
+            outcome = resp
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def _attempt(self, endpoint: str, params: dict | None, timeout: float) -> requests.Response:
+        breaker = breakers.get(endpoint)
+        breaker.before()
+        try:
+            budget.acquire()
+        except requests.RequestException:
+            breaker.cancel()
+            raise
+        headers = {}
+        key = _api_key()
+        if key:
+            headers["X-Finnhub-Token"] = key
+        url = f"{self.base_url}/{endpoint}"
+        started = time.perf_counter()
+        status = None
+        try:
+            resp = self._session.get(url, params=params, headers=headers, timeout=timeout)
+            status = resp.status_code
+            budget.observe(resp)
+            if _RECORD_DIR and status == 200:
+                _record(endpoint, params, resp)
+            return resp
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._histogram(endpoint).record(elapsed_ms, ok=status is not None and status < 400)
+            breaker.record(failed=status is None or status >= 500, elapsed_ms=elapsed_ms)
+
+    def stats(self) -> dict:
+        with self._hist_lock:
+            items = list(self._histograms.items())
+        return {endpoint: hist.snapshot() for endpoint, hist in sorted(items)}
+
+
+client = FinnhubClient()
+
+
+def stats() -> dict:
+    return {
+        "endpoints": client.stats(),
+        "budget": budget.stats(),
+        "breakers": breakers.stats(),
+    }
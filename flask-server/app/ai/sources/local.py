@@ -0,0 +1,77 @@
+"""
+Local JSONL news source.
+
+Reads articles from a JSON-lines file (one Finnhub-shaped article per
+line, plus a `symbol` or `related` field naming the ticker). Useful for
+offline development and for exercising the multi-source fan-out without
+touching the network.
+
+    {"symbol": "AAPL", "headline": "...", "summary": "...",
+     "url": "...", "source": "Reuters", "datetime": 1718000000}
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from ..models import RawArticle
+from .base import NewsSource
+
+
+class LocalFileSource(NewsSource):
+    name = "local"
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.environ.get("NEWS_LOCAL_FILE") or ""
+        self._by_ticker: dict[str, list[dict]] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, list[dict]]:
+        """Parse the file once and re-read only when it changes on disk."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return {}
+        with self._lock:
+            if mtime == self._mtime:
+                return self._by_ticker
+            by_ticker: dict[str, list[dict]] = {}
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    symbols = item.get("symbol") or item.get("related") or ""
+                    for sym in str(symbols).split(","):
+                        sym = sym.strip().upper()
+                        if sym:
+                            by_ticker.setdefault(sym, []).append(item)
+            self._by_ticker, self._mtime = by_ticker, mtime
+            return by_ticker
+
+    def fetch(self, ticker: str, days: int = 7) -> list[RawArticle]:
+        if not self.path:
+            return []
+        cutoff = int(time.time()) - days * 86400
+        out: list[RawArticle] = []
+        for item in self._load().get(ticker.upper(), []):
+            headline = (item.get("headline") or "").strip()
+            published = int(item.get("datetime") or 0)
+            if not headline or (published and published < cutoff):
+                continue
+            out.append(RawArticle(
+                headline=headline,
+                summary=(item.get("summary") or "").strip(),
+                url=item.get("url") or "",
+                source=item.get("source") or "",
+                published_at=published,
+                provider=self.name,
+            ))
+        return out
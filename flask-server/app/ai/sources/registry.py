@@ -0,0 +1,199 @@
+"""
+Multi-source news fan-out.
+
+Every configured NewsSource is queried at once, each with its own
+timeout and an optional hedged retry: if the first attempt hasn't
+answered within `hedge_after` seconds a second identical attempt is
+launched and whichever lands first wins. The overall deadline caps the
+whole fan-out; anything that lands after it is dropped.
+
+Results are merged in registry order (earlier sources win ties) and
+de-duplicated across providers by URL and normalized headline; the
+pipeline's near-duplicate clustering still runs afterwards.
+
+A source failing contributes zero articles. Only when *every* source
+fails is the first error re-raised, so the route layer and the
+pipeline's degraded mode still see real upstream failures. Timeouts are
+raised as `requests.Timeout` so they degrade like any other upstream
+failure. The first source is the primary: `fetch_all` also says whether
+it answered, so a backup-only result isn't mistaken for a full one.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+
+from ..models import RawArticle
+from .base import NewsSource
+from .finnhub import FinnhubSource
+from .local import LocalFileSource
+
+log = logging.getLogger("tickr.sources")
+
+_DEADLINE_S = 9.0
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="news-fanout")
+
+
+@dataclass
+class SourceSpec:
+    source: NewsSource
+    timeout: float                       # per-source budget, seconds
+    hedge_after: Optional[float] = None  # launch a second attempt after this
+
+
+class _Pending:
+    """Book-keeping for one source while the fan-out is running."""
+
+    def __init__(self, spec: SourceSpec, started: float):
+        self.spec = spec
+        self.started = started
+        self.attempts = 0
+        self.in_flight = 0
+        self.done = False
+        self.result: list[RawArticle] = []
+        self.error: Optional[BaseException] = None
+
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _url_key(url: str) -> str:
+    u = (url or "").strip().lower()
+    u = re.sub(r"^https?://(www\.)?", "", u)
+    return u.split("?", 1)[0].split("#", 1)[0].rstrip("/")
+
+
+def _headline_key(headline: str) -> str:
+    return _NON_ALNUM.sub(" ", (headline or "").lower()).strip()
+
+
+def merge_articles(batches: list[list[RawArticle]]) -> list[RawArticle]:
+    """Concatenate per-source results, dropping cross-provider duplicates."""
+    seen_urls: set[str] = set()
+    seen_heads: set[str] = set()
+    out: list[RawArticle] = []
+    for batch in batches:
+        for art in batch:
+            u = _url_key(art.url)
+            h = _headline_key(art.headline)
+            if (u and u in seen_urls) or (h and h in seen_heads):
+                continue
+            if u:
+                seen_urls.add(u)
+            if h:
+                seen_heads.add(h)
+            out.append(art)
+    return out
+
+
+class SourceRegistry:
+    def __init__(self, specs: list[SourceSpec], deadline: float = _DEADLINE_S):
+        self.specs = specs
+        self.deadline = deadline
+
+    def _submit(self, p: _Pending, ticker: str, days: int, futures: dict) -> None:
+        ctx = contextvars.copy_context()
+        fut = _pool.submit(ctx.run, p.spec.source.fetch, ticker, days)
+        futures[fut] = p
+        p.attempts += 1
+        p.in_flight += 1
+
+    def fetch_all(
+        self, ticker: str, days: int = 7, deadline: Optional[float] = None,
+    ) -> tuple[list[RawArticle], bool]:
+        """(merged articles, whether the primary source answered)."""
+        start = time.monotonic()
+        hard_stop = start + (self.deadline if deadline is None else deadline)
+        pending = [_Pending(spec, start) for spec in self.specs]
+        futures: dict[Future, _Pending] = {}
+        for p in pending:
+            self._submit(p, ticker, days, futures)
+
+        while True:
+            now = time.monotonic()
+            live = [p for p in pending if not p.done]
+            if not live or now >= hard_stop or not futures:
+                break
+
+            # Next wake-up: earliest hedge point, source timeout or deadline.
+            wake = hard_stop
+            for p in live:
+                wake = min(wake, p.started + p.spec.timeout)
+                if p.spec.hedge_after is not None and p.attempts == 1:
+                    wake = min(wake, p.started + p.spec.hedge_after)
+            done, _ = wait(list(futures), timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                p = futures.pop(fut)
+                p.in_flight -= 1
+                if p.done:
+                    continue   # a hedge sibling already answered
+                exc = fut.exception()
+                if exc is None:
+                    p.result, p.done = fut.result() or [], True
+                else:
+                    p.error = p.error or exc
+                    if p.in_flight == 0:
+                        p.done = True
+
+            now = time.monotonic()
+            for p in pending:
+                if p.done:
+                    continue
+                if now >= p.started + p.spec.timeout:
+                    p.error = p.error or requests.Timeout(f"{p.spec.source.name} timed out")
+                    p.done = True
+                elif (
+                    p.spec.hedge_after is not None
+                    and p.attempts == 1
+                    and now >= p.started + p.spec.hedge_after
+                ):
+                    self._submit(p, ticker, days, futures)
+
+        batches = []
+        errors = []
+        for p in pending:
+            if p.done and p.error is None:
+                batches.append(p.result)
+                continue
+            err = p.error or requests.Timeout(f"{p.spec.source.name} missed the fan-out deadline")
+            log.warning("News source %s contributed nothing for %s: %s", p.spec.source.name, ticker, err)
+            errors.append(err)
+
+        if not batches and errors:
+            raise errors[0]
+        primary_ok = bool(pending) and pending[0].done and pending[0].error is None
+        return merge_articles(batches), primary_ok
+
+
+def _build_default() -> SourceRegistry:
+    configured = os.environ.get("NEWS_SOURCES")
+    if configured is None:
+        configured = "finnhub,local" if os.environ.get("NEWS_LOCAL_FILE") else "finnhub"
+    specs = []
+    for name in (n.strip().lower() for n in configured.split(",")):
+        if name == "finnhub":
+            specs.append(SourceSpec(FinnhubSource(timeout=8), timeout=8.5, hedge_after=2.5))
+        elif name == "local":
+            specs.append(SourceSpec(LocalFileSource(), timeout=1.0))
+        elif name:
+            log.warning("Unknown news source %r in NEWS_SOURCES — ignored", name)
+    return SourceRegistry(specs)
+
+
+_default: Optional[SourceRegistry] = None
+
+
+def default_registry() -> SourceRegistry:
+    global _default
+    if _default is None:
+        _default = _build_default()
+    return _default
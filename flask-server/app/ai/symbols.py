@@ -54,15 +54,20 @@ def _index() -> list[dict]:
     return out
 
 
+@lru_cache(maxsize=1)
+def _names() -> dict[str, str]:
+    return {e["ticker"]: e["name"] for e in _index()}
+
+
 def get_company_name(ticker: str) -> Optional[str]:
     if not ticker:
         return None
     t = ticker.upper().strip()
 
     # 1. Curated index
-    for entry in _index():
-        if entry["ticker"] == t:
-            return entry["name"]
+    name = _names().get(t)
+    if name:
+        return name
 
     # 2. Cache (Finnhub responses)
     cached = symbol_cache.get(t)
@@ -79,6 +84,21 @@ def get_company_name(ticker: str) -> Optional[str]:
     return None
 
 
+def local_company_names(tickers) -> dict[str, str]:
+    """
+    Names for `tickers` from the curated index and the symbol cache only —
+    never goes upstream, so it's safe for bulk paths. Unknown tickers are
+    omitted.
+    """
+    names = _names()
+    out = {}
+    for t in {(t or "").upper().strip() for t in tickers} - {""}:
+        name = names.get(t) or symbol_cache.get(t)
+        if name:
+            out[t] = name
+    return out
+
+
 # ────── Search ───────────────────────────────────────────────────────────
 
 _TOKEN = re.compile(r"[A-Za-z0-9]+")
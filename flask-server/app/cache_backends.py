@@ -0,0 +1,478 @@
+"""
+Shared cache backends for multi-worker / multi-node deploys.
+
+TTLCache and SWRCache keep an in-process L1 either way. When
+CACHE_BACKEND names a shared store, they also write through to it and
+consult it on local misses, so one worker's Finnhub fetch or FinBERT
+run is reused by every other worker. Cold fetches take a cross-process
+single-flight lock so N workers don't all fetch the same key at once.
+
+  CACHE_BACKEND=memory                        (default; per-process only)
+  CACHE_BACKEND=redis://[:password@]host:6379/0
+  CACHE_BACKEND=sqlite:////home/site/data/cache.db
+
+Values are pickled (protocol 5) and zlib-compressed when large, behind a
+one-byte header. Pickle means the shared store must be trusted — it is
+ours alone, never user-writable.
+
+The Redis client speaks RESP2 over a plain socket (GET/SET/DEL/SCAN/
+EVAL only), in keeping with not adding wheel dependencies for small
+protocol needs.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Optional
+from urllib.parse import unquote, urlparse
+
+log = logging.getLogger("tickr.cache")
+
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+_COMPRESS_OVER = 512
+
+
+def encode(value: Any) -> bytes:
+    blob = pickle.dumps(value, protocol=5)
+    if len(blob) > _COMPRESS_OVER:
+        packed = zlib.compress(blob, 1)
+        if len(packed) < len(blob):
+            return _ZLIB + packed
+    return _RAW + blob
+
+
+def decode(data: bytes) -> Any:
+    head, body = data[:1], data[1:]
+    if head == _ZLIB:
+        body = zlib.decompress(body)
+    return pickle.loads(body)
+
+
+class CacheBackend(ABC):
+    """Byte-level key/value store with expiry and advisory locks."""
+
+    shared: bool = True
+    name: str = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def clear(self, prefix: str) -> None: ...
+
+    @abstractmethod
+    def try_lock(self, key: str, ttl: float) -> Optional[str]:
+        """Acquire `key` for `ttl` seconds. Returns an owner token or None."""
+
+    @abstractmethod
+    def unlock(self, key: str, token: str) -> None: ...
+
+    @contextmanager
+    def lock(self, key: str, ttl: float = 30.0, wait: float = 10.0):
+        """
+        Cross-process single-flight. Yields True when this process holds
+        the lock, False if `wait` ran out (callers then proceed anyway —
+        a duplicate fetch beats a stuck request).
+        """
+        deadline = time.monotonic() + wait
+        token = self.try_lock(key, ttl)
+        delay = 0.02
+        while token is None and time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(0.25, delay * 2)
+            token = self.try_lock(key, ttl)
+        try:
+            yield token is not None
+        finally:
+            if token is not None:
+                self.unlock(key, token)
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process. Present so callers can treat every backend alike."""
+
+    shared = False
+    name = "memory"
+
+    def __init__(self):
+        self._store: dict[str, tuple[float, Any]] = {}
+        self._locks: dict[str, tuple[str, float]] = {}
+        self._mu = threading.Lock()
+
+    def get(self, key):
+        with self._mu:
+            entry = self._store.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._store.pop(key, None)
+                return None
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._mu:
+            self._store[key] = (time.time() + ttl, value)
+
+    def delete(self, key):
+        with self._mu:
+            self._store.pop(key, None)
+
+    def clear(self, prefix):
+        with self._mu:
+            for k in [k for k in self._store if k.startswith(prefix)]:
+                del self._store[k]
+
+    def try_lock(self, key, ttl):
+        now = time.time()
+        with self._mu:
+            held = self._locks.get(key)
+            if held and held[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._locks[key] = (token, now + ttl)
+            return token
+
+    def unlock(self, key, token):
+        with self._mu:
+            held = self._locks.get(key)
+            if held and held[0] == token:
+                self._locks.pop(key, None)
+
+
+# ────── Redis (RESP2 over a socket) ──────────────────────────────────
+
+class RedisError(Exception):
+    pass
+
+
+class _RedisDown(ConnectionError):
+    """Raised without touching the network while Redis is backed off."""
+
+
+# After a connection failure, skip Redis for this long instead of paying
+# a connect timeout on every cache read.
+_REDIS_BACKOFF_S = 5.0
+
+
+class _RespConnection:
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def command(self, *args):
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            if not isinstance(a, bytes):
+                a = str(a).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(a), a))
+        self.sock.sendall(b"".join(out))
+        return self._read()
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            data = self.reader.read(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._read() for _ in range(n)]
+        raise RedisError(f"Unexpected RESP reply {line!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+_UNLOCK_LUA = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+
+class RedisBackend(CacheBackend):
+    name = "redis"
+
+    def __init__(self, url: str, pool_size: int = 8, timeout: float = 1.0):
+        u = urlparse(url)
+        self._host = u.hostname or "localhost"
+        self._port = u.port or 6379
+        self._password = unquote(u.password) if u.password else None
+        self._db = int((u.path or "/0").lstrip("/") or 0)
+        self._timeout = timeout
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+        self._down_until = 0.0
+
+    def _connect(self) -> _RespConnection:
+        conn = _RespConnection(self._host, self._port, self._timeout)
+        if self._password:
+            conn.command("AUTH", self._password)
+        if self._db:
+            conn.command("SELECT", self._db)
+        return conn
+
+    def _call(self, *args):
+        if time.monotonic() < self._down_until:
+            raise _RedisDown("Redis unavailable (backing off)")
+        try:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+        except OSError:
+            self._mark_down()
+            raise
+        try:
+            result = conn.command(*args)
+        except RedisError:
+            self._release(conn)   # server-side error; the stream is still in sync
+            raise
+        except OSError:
+            conn.close()
+            self._mark_down()
+            raise
+        self._release(conn)
+        return result
+
+    def _mark_down(self) -> None:
+        if time.monotonic() >= self._down_until:
+            log.warning("Redis unreachable; skipping the shared tier for %.0fs", _REDIS_BACKOFF_S)
+        self._down_until = time.monotonic() + _REDIS_BACKOFF_S
+        # Pooled sockets are likely dead too.
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    @staticmethod
+    def _warn(what: str, exc: Exception) -> None:
+        if not isinstance(exc, _RedisDown):
+            log.warning("Redis %s failed: %s", what, exc)
+
+    def _release(self, conn: _RespConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def get(self, key):
+        try:
+            data = self._call("GET", key)
+        except (OSError, RedisError) as exc:
+            self._warn("GET", exc)
+            return None
+        return decode(data) if data is not None else None
+
+    def set(self, key, value, ttl):
+        try:
+            self._call("SET", key, encode(value), "PX", max(1, int(ttl * 1000)))
+        except (OSError, RedisError) as exc:
+            self._warn("SET", exc)
+
+    def delete(self, key):
+        try:
+            self._call("DEL", key)
+        except (OSError, RedisError) as exc:
+            self._warn("DEL", exc)
+
+    def clear(self, prefix):
+        try:
+            cursor = b"0"
+            while True:
+                cursor, keys = self._call("SCAN", cursor, "MATCH", prefix + "*", "COUNT", 500)
+                if keys:
+                    self._call("DEL", *keys)
+                if cursor in (b"0", "0"):
+                    break
+        except (OSError, RedisError) as exc:
+            self._warn("clear", exc)
+
+    def try_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        try:
+            ok = self._call("SET", "lock:" + key, token, "NX", "PX", max(1, int(ttl * 1000)))
+        except (OSError, RedisError) as exc:
+            self._warn("lock", exc)
+            return token   # store down → behave like a per-process cache
+        return token if ok == "OK" else None
+
+    def unlock(self, key, token):
+        try:
+            self._call("EVAL", _UNLOCK_LUA, 1, "lock:" + key, token)
+        except (OSError, RedisError) as exc:
+            self._warn("unlock", exc)
+
+
+# ────── SQLite / shared file ─────────────────────────────────────────
+
+_SQLITE_PURGE_S = 300.0
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Shared file for several workers on one host (no Redis needed).
+    Expired rows are purged by whichever write comes due, at most every
+    `_SQLITE_PURGE_S` seconds per process, so the file stays bounded.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()
+        self._next_purge = 0.0
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_kv ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_locks ("
+            " key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_kv_expires ON cache_kv(expires)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=2.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM cache_kv WHERE key = ? AND expires > ?", (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as exc:
+            log.warning("SQLite cache GET failed: %s", exc)
+            return None
+        return decode(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO cache_kv (key, value, expires) VALUES (?, ?, ?)",
+                (key, encode(value), now + ttl),
+            )
+        except sqlite3.Error as exc:
+            log.warning("SQLite cache SET failed: %s", exc)
+        if now >= self._next_purge:
+            self._purge(now)
+
+    def _purge(self, now: float) -> None:
+        self._next_purge = now + _SQLITE_PURGE_S
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM cache_kv WHERE expires < ?", (now,))
+            conn.execute("DELETE FROM cache_locks WHERE expires < ?", (now,))
+        except sqlite3.Error as exc:
+            log.warning("SQLite cache purge failed: %s", exc)
+
+    def delete(self, key):
+        try:
+            self._conn().execute("DELETE FROM cache_kv WHERE key = ?", (key,))
+        except sqlite3.Error as exc:
+            log.warning("SQLite cache DELETE failed: %s", exc)
+
+    def clear(self, prefix):
+        try:
+            self._conn().execute(
+                "DELETE FROM cache_kv WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff"),
+            )
+        except sqlite3.Error as exc:
+            log.warning("SQLite cache clear failed: %s", exc)
+
+    def try_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        now = time.time()
+        try:
+            cur = self._conn().execute(
+                "INSERT INTO cache_locks (key, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE cache_locks.expires < ?",
+                (key, token, now + ttl, now),
+            )
+        except sqlite3.Error as exc:
+            log.warning("SQLite lock failed: %s", exc)
+            return token
+        return token if cur.rowcount == 1 else None
+
+    def unlock(self, key, token):
+        try:
+            self._conn().execute("DELETE FROM cache_locks WHERE key = ? AND owner = ?", (key, token))
+        except sqlite3.Error as exc:
+            log.warning("SQLite unlock failed: %s", exc)
+
+
+# ────── Selection ────────────────────────────────────────────────────
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def _build(spec: str) -> CacheBackend:
+    if spec.startswith(("redis://", "rediss://")):
+        if spec.startswith("rediss://"):
+            raise RuntimeError("TLS Redis (rediss://) is not supported by the built-in client.")
+        return RedisBackend(spec)
+    if spec.startswith("sqlite:///"):
+        return SQLiteBackend(spec[len("sqlite:///"):] or "cache.db")
+    return MemoryBackend()
+
+
+def get_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                spec = (os.environ.get("CACHE_BACKEND") or "memory").strip()
+                try:
+                    _backend = _build(spec)
+                except (RuntimeError, OSError, sqlite3.Error) as exc:
+                    log.warning("Cache backend %r unavailable (%s); using memory", spec, exc)
+                    _backend = MemoryBackend()
+                log.info("Cache backend: %s", _backend.name)
+    return _backend
+
+
+def shared_backend() -> Optional[CacheBackend]:
+    """The configured backend if it is shared across processes, else None."""
+    backend = get_backend()
+    return backend if backend.shared else None
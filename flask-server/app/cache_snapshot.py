@@ -0,0 +1,183 @@
+"""
+Warm-start snapshots of the in-process caches.
+
+A restart used to begin with every cache empty, so the first minutes
+after a deploy were the slowest of the day and burned upstream budget
+re-fetching what the previous process already knew. Registered caches
+are now dumped to one compact file on a timer and at interpreter exit
+(gunicorn's graceful shutdown), and reloaded at boot with their
+original absolute expiries — anything that expired while we were down
+is simply dropped.
+
+File layout (all offsets absolute):
+
+  b"TKSNAP1\\n" | section | section | ... | index | u32 index length
+
+The trailing index maps cache name → (offset, length); each section is
+one `cache_backends.encode`d list of entries. Boot only mmaps the file
+and reads the index off its tail. A cache decodes its own section the
+first time it is touched, so startup cost doesn't grow with the snapshot.
+
+  CACHE_SNAPSHOT_PATH      default: cache-snapshot.bin next to the DB; "off" disables
+  CACHE_SNAPSHOT_INTERVAL  seconds between periodic saves (default 300)
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Optional, Protocol
+
+from .cache_backends import decode, encode
+from .config import get_db_path
+
+log = logging.getLogger("tickr.snapshot")
+
+_MAGIC = b"TKSNAP1\n"
+_LEN = struct.Struct(">I")
+
+
+class Snapshottable(Protocol):
+    def snapshot_items(self) -> list: ...
+    def attach_warm(self, loader) -> None: ...
+
+
+def _default_path() -> Optional[str]:
+    path = os.environ.get("CACHE_SNAPSHOT_PATH")
+    if path is None:
+        return os.path.join(os.path.dirname(os.path.abspath(get_db_path())), "cache-snapshot.bin")
+    return None if path.strip().lower() in ("", "off", "none") else path
+
+
+class SnapshotReader:
+    """mmapped snapshot; sections are decoded on demand, once each."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._mm[: len(_MAGIC)] != _MAGIC:
+                raise ValueError("not a cache snapshot")
+            tail = len(self._mm) - _LEN.size
+            (index_len,) = _LEN.unpack_from(self._mm, tail)
+            self._index: dict[str, tuple[int, int]] = decode(self._mm[tail - index_len:tail])
+        except Exception:
+            self._mm.close()
+            raise
+
+    def sections(self) -> list[str]:
+        return list(self._index)
+
+    def take(self, name: str) -> list:
+        with self._lock:
+            span = self._index.pop(name, None)
+            if span is None:
+                return []
+            offset, length = span
+            blob = self._mm[offset:offset + length]
+            if not self._index:
+                self._mm.close()   # every section consumed
+        try:
+            return decode(blob)
+        except Exception as exc:  # noqa: BLE001 — a bad section just means a cold cache
+            log.warning("Snapshot section %s unreadable: %s", name, exc)
+            return []
+
+
+class CacheSnapshots:
+    def __init__(self):
+        self._caches: dict[str, Snapshottable] = {}
+        self._path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {"loaded_sections": 0, "saves": 0, "last_save": None, "bytes": 0}
+
+    def register(self, name: str, cache: Snapshottable) -> None:
+        self._caches[name] = cache
+
+    def start(self, path: Optional[str] = None, interval: Optional[float] = None) -> None:
+        """Idempotent. Attaches lazy loaders, then saves on a timer and at exit."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self._path = path if path is not None else _default_path()
+        if not self._path:
+            return
+        if os.path.isfile(self._path):
+            try:
+                reader = SnapshotReader(self._path)
+            except Exception as exc:  # noqa: BLE001
+                log.warning("Ignoring cache snapshot %s: %s", self._path, exc)
+            else:
+                for name in reader.sections():
+                    cache = self._caches.get(name)
+                    if cache is not None:
+                        cache.attach_warm(lambda n=name: reader.take(n))
+                        self._stats["loaded_sections"] += 1
+        interval = interval or float(os.environ.get("CACHE_SNAPSHOT_INTERVAL", "300"))
+        threading.Thread(target=self._run, args=(interval,), name="cache-snapshot", daemon=True).start()
+        atexit.register(self.save)
+
+    def _run(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            self.save()
+
+    def save(self) -> None:
+        if not self._path:
+            return
+        with self._lock:
+            sections: list[tuple[str, bytes]] = []
+            for name, cache in self._caches.items():
+                try:
+                    sections.append((name, encode(cache.snapshot_items())))
+                except Exception as exc:  # noqa: BLE001 — skip one bad cache, keep the rest
+                    log.warning("Snapshot of %s cache skipped: %s", name, exc)
+
+            index: dict[str, tuple[int, int]] = {}
+            offset = len(_MAGIC)
+            for name, blob in sections:
+                index[name] = (offset, len(blob))
+                offset += len(blob)
+            tail = encode(index)
+
+            # A private temp file per save: concurrent savers (other workers)
+            # each publish a complete file; the last os.replace wins.
+            directory = os.path.dirname(os.path.abspath(self._path))
+            tmp = None
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self._path) + ".", suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(_MAGIC)
+                    for _, blob in sections:
+                        f.write(blob)
+                    f.write(tail)
+                    f.write(_LEN.pack(len(tail)))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self._path)   # readers never see a half-written file
+            except OSError as exc:
+                log.warning("Cache snapshot write to %s failed: %s", self._path, exc)
+                if tmp is not None:
+                    try:
+                        os.unlink(tmp)
+                    except OSError:
+                        pass
+                return
+            self._stats["saves"] += 1
+            self._stats["last_save"] = int(time.time())
+            self._stats["bytes"] = offset + len(tail) + _LEN.size
+
+    def stats(self) -> dict:
+        return {"path": self._path, **self._stats}
+
+
+snapshots = CacheSnapshots()
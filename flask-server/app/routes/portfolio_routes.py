@@ -1,22 +1,32 @@
+import json
 import os
 import sqlite3
 from flask import Blueprint, jsonify, request
-import requests
 import jwt
-import time
 from datetime import datetime, timedelta
 from ..config import get_db_path
+from ..security import rate_limit
+from ..ai import analyze_tickers, local_company_names
+from ..ai.market import NY
+from ..ai.sentiment import combine_verdicts
+from ..ai.sources.finnhub import FinnhubSource
+from ..services import analytics, lot_import, market_data
+from ..services import positions
+from ..services.portfolio_history import backdate, portfolio_history
 
 # Environment variables are loaded in app/__init__.py
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # ENV_PATH is no longer needed for loading, as variables are already in os.environ
 
-API_KEY = os.environ.get("FINNHUB_API_KEY")
 SECRET_KEY = os.environ.get("SECRET_KEY")
 DB_PATH = get_db_path()
 
 portfolio_routes = Blueprint("portfolio", __name__)
 
+_MAX_HISTORY_DAYS = 10 * 366
+# /portfolio/history?range= → calendar days back (None = since first buy).
+HISTORY_RANGES = {"1W": 7, "1M": 31, "3M": 92, "6M": 183, "1Y": 366, "5Y": 5 * 366, "ALL": None}
+
 def get_user_from_token():
     token = request.headers.get("Authorization")
     if not token:
@@ -29,32 +39,9 @@ def get_user_from_token():
     except:
         return None
 
-def get_current_price(ticker):
-    if not API_KEY:
-        return None
-    url = f"https://finnhub.io/api/v1/quote?symbol={ticker}&token={API_KEY}"
-    try:
-        r = requests.get(url, headers={"Accept-Encoding": "identity"}, timeout=5)
-        if r.status_code == 200:
-            data = r.json()
-            return data.get("c")
-    except:
-        pass
-    return None
-
 def get_company_name(ticker):
-    if not API_KEY:
-        return ticker
-    url = "https://finnhub.io/api/v1/stock/profile2"
-    params = {"symbol": ticker, "token": API_KEY}
-    try:
-        r = requests.get(url, params=params, headers={"Accept-Encoding": "identity"}, timeout=5)
-        if r.status_code == 200:
-            data = r.json()
-            return data.get("name", ticker)
-    except:
-        pass
-    return ticker
+    profile = FinnhubSource.company_profile(ticker)
+    return profile.get("name", ticker) if profile else ticker
 
 @portfolio_routes.route("/portfolio", methods=["GET"])
 def get_portfolio():
@@ -64,29 +51,66 @@ def get_portfolio():
 
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    
-    # Fetch holdings
-    cursor.execute("SELECT ticker, quantity, avg_price, company_name, purchase_date FROM holdings WHERE user_id = ?", (user_id,))
-    rows = cursor.fetchall()
+
+    # Aggregates come from the materialized positions table (PK lookup);
+    # lots are still listed because the client renders them per lot.
+    cursor.execute(
+        "SELECT ticker, quantity, cost_basis, company_name, first_purchase, last_purchase "
+        "FROM positions WHERE user_id = ? ORDER BY ticker",
+        (user_id,),
+    )
+    position_rows = cursor.fetchall()
+    rows = []
+    if request.args.get("lots", "1") != "0":
+        cursor.execute(
+            "SELECT ticker, quantity, avg_price, company_name, purchase_date FROM holdings "
+            "WHERE user_id = ? ORDER BY ticker, COALESCE(purchase_date, ''), id",
+            (user_id,),
+        )
+        rows = cursor.fetchall()
     conn.close()
 
-    portfolio = []
-    total_value = 0
-    total_cost = 0
+    # Price each unique ticker once through the shared quote cache; misses
+    # are fetched concurrently. A ticker that can't be priced falls back
+    # to cost basis and is flagged stale.
+    quotes = market_data.get_quotes([row[0] for row in position_rows], watch=True)
 
-    for row in rows:
-        ticker, quantity, avg_price, company_name, purchase_date = row
-        current_price = get_current_price(ticker)
-        
-        if current_price is None:
-            current_price = avg_price
+    def _mark(ticker, fallback):
+        quote = quotes.get(ticker)
+        price = quote.get("price") if quote else None
+        if price is None:
+            return fallback, True
+        return price, bool(quote.get("stale"))
 
+    positions_out = []
+    total_value = 0
+    total_cost = 0
+    for ticker, quantity, cost_basis, company_name, first_purchase, last_purchase in position_rows:
+        avg_cost = cost_basis / quantity if quantity else 0
+        current_price, stale = _mark(ticker, avg_cost)
         market_value = quantity * current_price
-        cost_basis = quantity * avg_price
-        
         total_value += market_value
         total_cost += cost_basis
+        positions_out.append({
+            "ticker": ticker,
+            "name": company_name or ticker,
+            "quantity": quantity,
+            "avg_price": avg_cost,
+            "cost_basis": cost_basis,
+            "current_price": current_price,
+            "market_value": market_value,
+            "gain_loss": market_value - cost_basis,
+            "gain_loss_percent": ((market_value - cost_basis) / cost_basis * 100) if cost_basis > 0 else 0,
+            "first_purchase": first_purchase,
+            "last_purchase": last_purchase,
+            "stale": stale,
+        })
 
+    portfolio = []
+    for ticker, quantity, avg_price, company_name, purchase_date in rows:
+        current_price, stale = _mark(ticker, avg_price)
+        market_value = quantity * current_price
+        cost_basis = quantity * avg_price
         portfolio.append({
             "ticker": ticker,
             "name": company_name or ticker,
@@ -96,7 +120,8 @@ def get_portfolio():
             "market_value": market_value,
             "gain_loss": market_value - cost_basis,
             "gain_loss_percent": ((market_value - cost_basis) / cost_basis * 100) if cost_basis > 0 else 0,
-            "purchase_date": purchase_date
+            "purchase_date": purchase_date,
+            "stale": stale,
         })
 
     overall_gain_loss = total_value - total_cost
@@ -104,6 +129,7 @@ def get_portfolio():
 
     return jsonify({
         "holdings": portfolio,
+        "positions": positions_out,
         "total_value": total_value,
         "total_cost": total_cost,
         "overall_gain_loss": overall_gain_loss,
@@ -125,19 +151,25 @@ def add_stock():
     if quantity <= 0 or price <= 0:
         return jsonify({"message": "Invalid quantity or price"}), 400
         
-    # Validate date
+    # Validate date — "today" is the New York trading day snapshots are keyed by
+    today = datetime.now(NY).date()
     if not purchase_date:
-        purchase_date = datetime.now().strftime("%Y-%m-%d")
+        purchase_date = today.isoformat()
     
     try:
-        p_date = datetime.strptime(purchase_date, "%Y-%m-%d")
-        if p_date > datetime.now():
+        p_date = datetime.strptime(purchase_date, "%Y-%m-%d").date()
+        if p_date > today:
              return jsonify({"message": "Purchase date cannot be in the future"}), 400
     except ValueError:
         return jsonify({"message": "Invalid date format"}), 400
 
     company_name = get_company_name(ticker)
 
+    # Closes for folding a backdated lot into past snapshots — fetched
+    # before the write transaction, since it may backfill the EOD store.
+    lot = (ticker, quantity, price, purchase_date)
+    closes = portfolio_history.backdate_closes(user_id, [lot])
+
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
@@ -165,14 +197,94 @@ def add_stock():
     # Let's just INSERT new rows. The frontend "Holdings" list can aggregate them visually.
     # Wait, the previous `init_db` didn't set unique constraint.
     
-    cursor.execute(
-        "INSERT INTO holdings (user_id, ticker, quantity, avg_price, company_name, purchase_date) VALUES (?, ?, ?, ?, ?, ?)", 
-        (user_id, ticker, quantity, price, company_name, purchase_date)
-    )
-
-    conn.commit()
+    # Lot insert, position upsert and snapshot adjustment share one transaction.
+    with portfolio_history.user_lock(user_id):
+        positions.record_buys(cursor, user_id, [(ticker, quantity, price, company_name, purchase_date)])
+        partial = backdate(cursor, user_id, [lot], closes)
+        conn.commit()
     conn.close()
-    return jsonify({"message": f"Added {quantity} shares of {ticker}"})
+    analytics.invalidate(user_id)
+    out = {"message": f"Added {quantity} shares of {ticker}"}
+    if partial:
+        out["history_partial"] = True   # earlier days show only this lot
+    return jsonify(out)
+
+_MAX_IMPORT_ERRORS = 20
+
+
+@portfolio_routes.route("/portfolio/import", methods=["POST"])
+def import_lots():
+    """
+    Bulk-add lots from CSV (raw body or a `file` upload) or JSON (a list of
+    lots, or {"lots": [...]}). All-or-nothing: any invalid row rejects the
+    import with per-row errors.
+    """
+    user_id = get_user_from_token()
+    if not user_id:
+        return jsonify({"message": "Unauthorized"}), 401
+
+    upload = request.files.get("file")
+    try:
+        if upload is not None and (upload.filename or "").lower().endswith(".json"):
+            payload = json.load(upload.stream)
+            rows = payload.get("lots") if isinstance(payload, dict) else payload
+        elif upload is not None:
+            rows = lot_import.csv_rows(upload.stream)
+        elif request.is_json:
+            payload = request.get_json(silent=True)
+            rows = payload.get("lots") if isinstance(payload, dict) else payload
+        else:
+            rows = lot_import.csv_rows(request.stream)
+        if not hasattr(rows, "__iter__") or isinstance(rows, (str, dict)):
+            return jsonify({"message": "Expected a list of lots"}), 400
+
+        lots, errors, error_count = [], [], 0
+        for n, lot, error in lot_import.iter_rows(rows, today=datetime.now(NY).date()):
+            if error:
+                error_count += 1
+                if len(errors) < _MAX_IMPORT_ERRORS:
+                    errors.append({"row": n, "message": error})
+            else:
+                lots.append(lot)
+    except (ValueError, UnicodeDecodeError):
+        return jsonify({"message": "Could not parse the import file"}), 400
+
+    if error_count:
+        return jsonify({
+            "message": f"{error_count} invalid row(s); nothing was imported",
+            "errors": errors,
+            "error_count": error_count,
+        }), 400
+    if not lots:
+        return jsonify({"message": "No lots to import"}), 400
+
+    # Names from the bundled index / symbol cache only — no upstream call
+    # per row. Unknown names stay NULL (the position keeps any it had).
+    names = local_company_names({lot[0] for lot in lots})
+
+    closes = portfolio_history.backdate_closes(user_id, lots)
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cursor = conn.cursor()
+        with portfolio_history.user_lock(user_id):
+            positions.record_buys(
+                cursor, user_id,
+                [(ticker, quantity, price, names.get(ticker), bought) for ticker, quantity, price, bought in lots],
+            )
+            partial = backdate(cursor, user_id, lots, closes)
+            conn.commit()
+    finally:
+        conn.close()
+    analytics.invalidate(user_id)
+
+    return jsonify({
+        "message": f"Imported {len(lots)} lots",
+        "imported": len(lots),
+        "tickers": len({lot[0] for lot in lots}),
+        # History before the earlier first snapshot shows only these lots.
+        "history_partial": partial,
+    })
 
 @portfolio_routes.route("/portfolio/remove", methods=["POST"])
 def remove_stock():
@@ -183,41 +295,36 @@ def remove_stock():
     data = request.get_json()
     ticker = data.get("ticker").upper()
     quantity = int(data.get("quantity"))
+    if quantity <= 0:
+        return jsonify({"message": "Invalid quantity"}), 400
 
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
-    # Fetch all lots for this ticker
-    cursor.execute("SELECT id, quantity FROM holdings WHERE user_id = ? AND ticker = ? ORDER BY purchase_date ASC", (user_id, ticker))
-    lots = cursor.fetchall() # FIFO
+    # Take the write lock up front so the ownership check and the sell
+    # can't interleave with another sell of the same position — nor, via
+    # the user lock, with a snapshot update or backdate for this user.
+    with portfolio_history.user_lock(user_id):
+        cursor.execute("BEGIN IMMEDIATE")
+        total_owned = positions.held_quantity(cursor, user_id, ticker)
 
-    if not lots:
-        conn.close()
-        return jsonify({"message": "Stock not found"}), 404
+        if not total_owned:
+            conn.rollback()
+            conn.close()
+            return jsonify({"message": "Stock not found"}), 404
 
-    total_owned = sum(l[1] for l in lots)
-    if quantity > total_owned:
-        conn.close()
-        return jsonify({"message": "Insufficient shares"}), 400
+        if quantity > total_owned:
+            conn.rollback()
+            conn.close()
+            return jsonify({"message": "Insufficient shares"}), 400
 
-    remaining_to_sell = quantity
-    
-    for lot_id, lot_qty in lots:
-        if remaining_to_sell <= 0:
-            break
-        
-        if lot_qty <= remaining_to_sell:
-            # Sell entire lot
-            cursor.execute("DELETE FROM holdings WHERE id = ?", (lot_id,))
-            remaining_to_sell -= lot_qty
-        else:
-            # Partial sell
-            new_qty = lot_qty - remaining_to_sell
-            cursor.execute("UPDATE holdings SET quantity = ? WHERE id = ?", (new_qty, lot_id))
-            remaining_to_sell = 0
+        # FIFO, set-based: whole lots deleted in one statement, the boundary
+        # lot trimmed in another, position re-derived — one transaction.
+        positions.sell_fifo(cursor, user_id, ticker, quantity)
 
-    conn.commit()
+        conn.commit()
     conn.close()
+    analytics.invalidate(user_id)
     return jsonify({"message": f"Sold {quantity} shares of {ticker}"})
 
 @portfolio_routes.route("/portfolio/history", methods=["GET"])
@@ -226,92 +333,149 @@ def get_portfolio_history():
     if not user_id:
         return jsonify({"message": "Unauthorized"}), 401
 
+    range_ = request.args.get("range")
+    if range_ is not None:
+        range_ = range_.upper()
+        if range_ not in HISTORY_RANGES:
+            return jsonify({"message": f"Unknown range; expected one of {', '.join(HISTORY_RANGES)}"}), 400
+        days = HISTORY_RANGES[range_] or _MAX_HISTORY_DAYS
+    else:
+        try:
+            days = max(1, min(_MAX_HISTORY_DAYS, int(request.args.get("days", 30))))
+        except (TypeError, ValueError):
+            days = 30
+
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute("SELECT ticker, quantity, avg_price, purchase_date FROM holdings WHERE user_id = ?", (user_id,))
-    holdings = cursor.fetchall()
+    cursor.execute("SELECT ticker, quantity, cost_basis FROM positions WHERE user_id = ?", (user_id,))
+    held = cursor.fetchall()
     conn.close()
 
-    if not holdings:
-        return jsonify([])
+    today = datetime.now(NY).date()
+    # Closed days come from the nightly snapshots — one indexed range scan.
+    # A user not yet caught up gets what's stored, flagged by a header.
+    rows, pending = portfolio_history.series(user_id, today - timedelta(days=days), today)
+    points = [
+        {"day": d, "value": value, "cost": cost, "pnl": pnl}
+        for d, value, cost, pnl in rows
+    ]
+
+    # Today (or anything after the last settled close) is marked live.
+    today_str = today.isoformat()
+    if held and (not points or points[-1]["day"] < today_str):
+        quotes = market_data.get_quotes([t for t, _, _ in held], watch=True)
+        value = cost = 0.0
+        for ticker, quantity, cost_basis in held:
+            q = quotes.get(ticker)
+            price = q.get("price") if q else None
+            value += quantity * (price if price is not None else cost_basis / quantity)
+            cost += cost_basis
+        points.append({"day": today_str, "value": value, "cost": cost, "pnl": value - cost})
+
+    for p in points:
+        p["date"] = datetime.strptime(p["day"], "%Y-%m-%d").strftime("%m/%d")
+    resp = jsonify(points)
+    if pending:
+        resp.headers["X-History-Pending"] = "1"
+    return resp
+
+
+@portfolio_routes.route("/portfolio/analytics", methods=["GET"])
+def get_portfolio_analytics():
+    """Risk metrics for current holdings (see services/analytics.py)."""
+    user_id = get_user_from_token()
+    if not user_id:
+        return jsonify({"message": "Unauthorized"}), 401
 
-    # 1. Get unique tickers
-    unique_tickers = list(set(h[0] for h in holdings))
-    
-    # 2. Fetch price history for all tickers (Last 30 days)
-    # Finnhub candles 'D'
-    ticker_histories = {}
-    
-    to_ts = int(time.time())
-    from_ts = to_ts - (30 * 24 * 60 * 60) 
-
-    for t in unique_tickers:
-        if not API_KEY: break
-        url = "https://finnhub.io/api/v1/stock/candle"
-        params = {
-            "symbol": t,
-            "resolution": "D",
-            "from": from_ts,
-            "to": to_ts,
-            "token": API_KEY
+    range_ = (request.args.get("range") or "1Y").upper()
+    if range_ not in analytics.ANALYTICS_RANGES:
+        return jsonify({"message": f"Unknown range; expected one of {', '.join(analytics.ANALYTICS_RANGES)}"}), 400
+
+    conn = sqlite3.connect(DB_PATH)
+    held = dict(conn.execute("SELECT ticker, quantity FROM positions WHERE user_id = ?", (user_id,)).fetchall())
+    conn.close()
+    if not held:
+        return jsonify({"message": "No holdings"}), 404
+
+    return jsonify(analytics.portfolio_analytics(user_id, held, range_))
+
+
+# Portfolio sentiment answers within this budget; tickers still being
+# analysed are returned as pending and land in the report cache.
+_SENTIMENT_DEADLINE_S = 8.0
+
+
+@portfolio_routes.route("/portfolio/sentiment", methods=["GET"])
+@rate_limit(limit=10, window=60, scope="news")
+def get_portfolio_sentiment():
+    """Market-value-weighted news sentiment over the user's positions."""
+    user_id = get_user_from_token()
+    if not user_id:
+        return jsonify({"message": "Unauthorized"}), 401
+
+    try:
+        days = max(1, min(30, int(request.args.get("days", 7))))
+    except (TypeError, ValueError):
+        days = 7
+
+    conn = sqlite3.connect(DB_PATH)
+    held = conn.execute(
+        "SELECT ticker, quantity, cost_basis, company_name FROM positions WHERE user_id = ? ORDER BY ticker",
+        (user_id,),
+    ).fetchall()
+    conn.close()
+    if not held:
+        return jsonify({"message": "No holdings"}), 404
+
+    tickers = [t for t, _, _, _ in held]
+    quotes = market_data.get_quotes(tickers, watch=True)
+    reports, pending, errors = analyze_tickers(
+        tickers, days=days, timeout=_SENTIMENT_DEADLINE_S,
+        companies={t: name for t, _, _, name in held if name},
+    )
+
+    total_value = 0.0
+    rows = []
+    for ticker, quantity, cost_basis, name in held:
+        quote = quotes.get(ticker)
+        price = quote.get("price") if quote else None
+        value = quantity * price if price is not None else cost_basis
+        total_value += value
+        rows.append((ticker, name, value))
+
+    positions_out, weighted = [], []
+    for ticker, name, value in rows:
+        entry = {
+            "ticker": ticker,
+            "name": name or ticker,
+            "market_value": value,
+            "weight": value / total_value if total_value else 0.0,
         }
-        try:
-            r = requests.get(url, params=params, headers={"Accept-Encoding": "identity"}, timeout=5)
-            if r.status_code == 200:
-                data = r.json()
-                if data.get("s") == "ok":
-                    # Map timestamp to price
-                    # { 167...: 150.00, ... }
-                    prices = {}
-                    for i, ts in enumerate(data.get("t", [])):
-                        # Normalize ts to midnight/date string to match easier
-                        date_str = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
-                        prices[date_str] = data["c"][i]
-                    ticker_histories[t] = prices
-        except:
-            pass
-
-    # 3. Construct Portfolio History
-    # Generate list of dates for last 30 days
-    history_graph = []
-    start_date = datetime.now() - timedelta(days=30)
-    
-    for i in range(31):
-        current_date = start_date + timedelta(days=i)
-        date_str = current_date.strftime("%Y-%m-%d")
-        
-        day_total_value = 0
-        
-        # Calculate value of portfolio on this day
-        for h in holdings:
-            ticker, qty, price, buy_date_str = h
-            
-            # Check if stock was owned on this date
-            # buy_date_str is YYYY-MM-DD
-            if buy_date_str <= date_str:
-                # Get price on this date
-                hist = ticker_histories.get(ticker, {})
-                
-                # If price exists for this date, use it. 
-                # If not (weekend/holiday), use last known price? 
-                # For simplicity, try direct match, else iterate back or use buy_price if missing
-                current_stock_price = hist.get(date_str)
-                
-                if current_stock_price is None:
-                    # Fallback: find closest previous date in history
-                    # or just use the buy_price if we can't find history (bad assumption but prevents crash)
-                    current_stock_price = price # Cost basis as fallback
-                    
-                    # Better fallback: most recent price in hist before date_str
-                    sorted_dates = sorted([d for d in hist.keys() if d <= date_str])
-                    if sorted_dates:
-                        current_stock_price = hist[sorted_dates[-1]]
-
-                day_total_value += qty * current_stock_price
-        
-        history_graph.append({
-            "date": current_date.strftime("%m/%d"),
-            "value": day_total_value
-        })
+        report = reports.get(ticker)
+        if report is not None:
+            v = report.verdict
+            weighted.append((value, v))
+            entry.update({
+                "status": "ok",
+                "label": v.label,
+                "score": v.score,
+                "confidence": v.confidence,
+                "momentum": v.momentum,
+                "article_count": v.article_count,
+                "top_drivers": v.top_drivers,
+                "degraded": report.degraded,
+            })
+        else:
+            entry["status"] = "pending" if ticker in pending else "error"
+        positions_out.append(entry)
 
-    return jsonify(history_graph)
\ No newline at end of file
+    covered = sum(w for w, _ in weighted)
+    return jsonify({
+        "verdict": combine_verdicts(weighted),
+        "coverage": covered / total_value if total_value else 0.0,
+        "positions": positions_out,
+        "pending": pending,
+        "failed": sorted(errors),
+        "complete": not pending,
+        "days": days,
+    })
@@ -5,6 +5,7 @@ Thin transport layer — all market intelligence lives in app.services.
 """
 from __future__ import annotations
 
+import base64
 import logging
 
 import requests
@@ -12,6 +13,8 @@ from flask import Blueprint, jsonify, request
 
 from ..ai import analyze_ticker, search_symbols, get_company_name, list_trending
 from ..ai.market import market_state
+from ..ai.sources.breaker import CircuitOpen
+from ..ai.sources.budget import BudgetExhausted
 from ..security import rate_limit
 from ..services import market_data
 
@@ -19,21 +22,42 @@ from ..services import market_data
 log = logging.getLogger("tickr.stocks")
 stock_routes = Blueprint("stocks", __name__)
 
+# Article keys dropped by ?compact=1 — the long-form text and the
+# per-article class distribution dominate the payload size.
+_COMPACT_DROP = ("summary", "distribution", "source_weight", "recency_weight")
+_MAX_PAGE = 50
+
+# /api/quotes: tickers per request and the quote fields returned as columns.
+_MAX_BATCH = 50
+_BATCH_FIELDS = ("price", "change", "change_percent", "previous_close", "stale")
+
 
 # ────── Sentiment / news ─────────────────────────────────────────────
 
 @stock_routes.route("/stock/<ticker>", methods=["GET"])
 @rate_limit(limit=30, window=60, scope="news")
 def get_stock_report(ticker: str):
+    """
+    Full sentiment report for one ticker.
+
+    Query params for list views that only need a slice of it:
+      fields   — comma-separated projection, e.g. `verdict` or
+                 `ticker,verdict.label,verdict.score,news`
+      limit    — page size over `articles` (and the derived `news`)
+      cursor   — opaque `page.next_cursor` from a previous response
+      compact  — drop summaries and per-article distributions
+    """
     try:
         days = max(1, min(30, int(request.args.get("days", 7))))
     except (TypeError, ValueError):
         days = 7
 
     if request.args.get("refresh") in ("1", "true", "yes"):
+        # Only this ticker's entries — the caches are shared across workers.
         from ..ai.cache import news_cache, report_cache
-        news_cache.clear()
-        report_cache.clear()
+        key = f"{ticker.upper().strip()}::{days}"
+        news_cache.delete(f"raw::{key}")
+        report_cache.delete(f"report::{key}")
 
     try:
         report = analyze_ticker(ticker, days=days)
@@ -46,6 +70,10 @@ def get_stock_report(ticker: str):
         if status in (401, 403):
             return jsonify({"error": "News provider authentication failed."}), 502
         return jsonify({"error": f"News provider returned {status}."}), 502
+    except BudgetExhausted:
+        return jsonify({"error": "News provider is busy — try again shortly."}), 503
+    except CircuitOpen:
+        return jsonify({"error": "News provider is temporarily unavailable."}), 503
     except requests.RequestException as exc:
         log.warning("News provider unreachable: %s", exc)
         return jsonify({"error": "Unable to reach news provider."}), 502
@@ -54,25 +82,103 @@ def get_stock_report(ticker: str):
         return jsonify({"error": "Sentiment pipeline failed"}), 500
 
     payload = report.to_dict()
+    total = len(payload["articles"])
+    if not total:
+        payload["message"] = "No analyzable headlines were found in the lookback window."
+
+    # Cursor pagination over articles. Without ?limit the full list is
+    # returned so existing callers see the same payload as before.
+    offset = _decode_cursor(request.args.get("cursor"))
+    try:
+        limit = max(1, min(_MAX_PAGE, int(request.args["limit"])))
+    except (KeyError, TypeError, ValueError):
+        limit = None
+    end = total if limit is None else offset + limit
+    articles = payload["articles"][offset:end]
+    if request.args.get("compact") in ("1", "true", "yes"):
+        articles = [
+            {k: v for k, v in a.items() if k not in _COMPACT_DROP}
+            for a in articles
+        ]
+    payload["articles"] = articles
     payload["news"] = [
         {
             "headline": a["headline"],
             "sentiment": a["sentiment_label"].capitalize(),
             "confidence": round(a["sentiment_confidence"], 3),
+            "publishedAt": a["published_at"],
         }
-        for a in payload["articles"]
+        for a in articles
     ]
-    if not payload["articles"]:
-        payload["message"] = "No analyzable headlines were found in the lookback window."
+    payload["page"] = {
+        "total": total,
+        "next_cursor": _encode_cursor(end) if end < total else None,
+    }
+
+    fields = request.args.get("fields")
+    if fields:
+        payload = _project(payload, fields)
     return jsonify(payload)
 
 
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str | None) -> int:
+    """Opaque cursor → article offset. Malformed cursors restart at 0."""
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, _, value = raw.partition(":")
+        return max(0, int(value)) if prefix == "o" else 0
+    except (ValueError, UnicodeDecodeError):
+        return 0
+
+
+def _project(payload: dict, fields: str) -> dict:
+    """
+    Keep only the requested keys. Accepts top-level names (`verdict`,
+    `news`) and one level of dotted paths (`verdict.label`).
+    `page` and `message` always survive so clients can keep paginating.
+    """
+    out: dict = {}
+    for name in (f.strip() for f in fields.split(",")):
+        if not name:
+            continue
+        head, _, sub = name.partition(".")
+        if head not in payload:
+            continue
+        if sub and isinstance(payload[head], dict):
+            if sub in payload[head]:
+                out.setdefault(head, {})[sub] = payload[head][sub]
+        else:
+            out[head] = payload[head]
+    for key in ("page", "message"):
+        if key in payload:
+            out[key] = payload[key]
+    return out
+
+
 # ────── Intraday history ─────────────────────────────────────────────
 
 @stock_routes.route("/stock/<ticker>/history", methods=["GET"])
 @rate_limit(limit=60, window=60, scope="history")
 def get_stock_history(ticker: str):
-    return jsonify(market_data.get_intraday(ticker))
+    """
+    Columnar OHLCV bars for `?range=` (1D, 5D, 1M, 6M, 1Y, 5Y; default 1D).
+    `?format=points` also returns the old 1D point list.
+    """
+    range_ = (request.args.get("range") or "1D").upper()
+    if range_ not in market_data.HISTORY_RANGES:
+        return jsonify({
+            "message": f"Unknown range; use one of {', '.join(market_data.HISTORY_RANGES)}",
+        }), 400
+    if range_ == "1D":
+        legacy = request.args.get("format") == "points"
+        return jsonify({**market_data.get_intraday(ticker, legacy=legacy), "range": "1D"})
+    return jsonify(market_data.get_history(ticker, range_))
 
 
 @stock_routes.route("/stock/<ticker>/quote", methods=["GET"])
@@ -132,6 +238,40 @@ def market_movers():
     return jsonify(market_data.list_movers(limit=limit))
 
 
+@stock_routes.route("/api/quotes", methods=["GET"])
+@rate_limit(limit=60, window=60, scope="quotes")
+def batch_quotes():
+    """
+    Dashboard/watchlist board in one round-trip:
+      GET /api/quotes?tickers=AAPL,MSFT,...&sparkline=24
+
+    Columnar response — one array per field, aligned with `tickers` —
+    so a 20-card board is a single compact payload. Unknown or unavailable
+    tickers come back as nulls in their slot.
+    """
+    tickers = [t for t in (request.args.get("tickers") or "").split(",") if t.strip()]
+    if not tickers:
+        return jsonify({"error": "Pass ?tickers=AAPL,MSFT,..."}), 400
+    tickers = tickers[:_MAX_BATCH]
+    try:
+        points = int(request.args.get("sparkline", 0))
+    except (TypeError, ValueError):
+        points = 0
+    points = max(8, min(48, points)) if points else 0
+
+    board = market_data.get_quote_board(tickers, points=points)
+    names = list(board)
+    quotes = [board[t]["quote"] or {} for t in names]
+    payload = {
+        "tickers": names,
+        **{field: [q.get(field) for q in quotes] for field in _BATCH_FIELDS},
+        "market": market_state(),
+    }
+    if points:
+        payload["sparkline"] = [board[t]["sparkline"] or [] for t in names]
+    return jsonify(payload)
+
+
 @stock_routes.route("/api/market/sparkline/<ticker>", methods=["GET"])
 @rate_limit(limit=120, window=60, scope="sparkline")
 def market_sparkline(ticker: str):
@@ -0,0 +1,100 @@
+"""
+Server-Sent Events routes.
+
+One long-lived connection per client replaces per-card quote polling.
+All connections share a single server-side fan-out (see
+app.services.quote_broadcast); a connection only receives quotes that
+changed since the last push.
+
+Thread cost: under gunicorn's gthread worker every open stream holds one
+request thread for its whole lifetime. Streams are therefore capped at
+SSE_MAX_STREAMS per process (default 4; startup.sh runs 8 threads) so
+the rest of the pool always serves the API. Past the cap the route
+answers 503 with Retry-After, and clients fall back to polling. A
+client that drops frees its slot at the next heartbeat write.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from ..ai.market import market_state
+from ..security import rate_limit
+from ..services.quote_broadcast import broadcaster
+
+
+stream_routes = Blueprint("stream", __name__)
+
+_MAX_TICKERS = 25
+_HEARTBEAT_S = 15
+# Each open stream pins a gunicorn thread. Cap its lifetime so a handful
+# of idle tabs can't starve the pool; EventSource reconnects on its own.
+_MAX_LIFETIME_S = 300
+_MAX_STREAMS = max(0, int(os.environ.get("SSE_MAX_STREAMS", "4")))
+_slots = threading.BoundedSemaphore(_MAX_STREAMS) if _MAX_STREAMS else None
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@stream_routes.route("/api/stream/quotes", methods=["GET"])
+@rate_limit(limit=20, window=60, scope="stream")
+def stream_quotes():
+    tickers = []
+    for t in (request.args.get("tickers") or "").split(","):
+        t = t.strip().upper()
+        if t and t not in tickers and t.replace(".", "").replace("-", "").isalnum():
+            tickers.append(t)
+    if not tickers:
+        return jsonify({"error": "Pass ?tickers=AAPL,MSFT,..."}), 400
+    tickers = tickers[:_MAX_TICKERS]
+
+    if _slots is None or not _slots.acquire(blocking=False):
+        resp = jsonify({"error": "Too many live streams — poll /api/quotes instead."})
+        resp.headers["Retry-After"] = "30"
+        return resp, 503
+
+    released = threading.Event()
+
+    def release():
+        # Runs when the response closes, even if the generator never started.
+        if not released.is_set():
+            released.set()
+            _slots.release()
+
+    sub = broadcaster.subscribe(tickers)
+
+    def generate():
+        deadline = time.monotonic() + _MAX_LIFETIME_S
+        try:
+            yield "retry: 3000\n\n"
+            yield _sse("market", market_state())
+            while time.monotonic() < deadline:
+                try:
+                    event = sub.queue.get(timeout=_HEARTBEAT_S)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield _sse("quote", event)
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    resp = Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",   # don't let proxies buffer the stream
+        },
+    )
+    resp.call_on_close(release)
+    resp.call_on_close(lambda: broadcaster.unsubscribe(sub))
+    return resp
@@ -130,6 +130,34 @@ def rate_limit(limit: int, window: int, scope: str = "default"):
     return deco
 
 
+# ────── Operator-only endpoints ──────────────────────────────────────
+#
+# /metrics and friends. With METRICS_TOKEN set, callers present it as a
+# bearer token; unset, only loopback callers (a sidecar scraper, ssh -L)
+# are let through. X-Forwarded-For is deliberately ignored here.
+
+_LOOPBACK = {"127.0.0.1", "::1"}
+
+
+def operator_only(fn):
+    """Decorator: require METRICS_TOKEN (or a loopback peer when unset)."""
+    @wraps(fn)
+    def wrapped(*args, **kwargs):
+        token = os.environ.get("METRICS_TOKEN", "")
+        if token:
+            auth = request.headers.get("Authorization", "")
+            given = auth[7:] if auth[:7].lower() == "bearer " else ""
+            if not secrets.compare_digest(given.encode(), token.encode()):
+                resp = jsonify({"message": "Unauthorized"})
+                resp.status_code = 401
+                resp.headers["WWW-Authenticate"] = "Bearer"
+                return resp
+        elif request.remote_addr not in _LOOPBACK:
+            return jsonify({"message": "Forbidden"}), 403
+        return fn(*args, **kwargs)
+    return wrapped
+
+
 # ────── HTTP security headers ────────────────────────────────────────
 
 _SECURITY_HEADERS = {
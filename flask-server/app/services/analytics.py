@@ -0,0 +1,170 @@
+"""
+Portfolio risk analytics.
+
+Risk is measured on the portfolio as it stands today — current share
+counts held constant over the window — so buys and sells inside the
+window don't show up as returns. Everything is computed from the EOD
+store's daily closes as array operations over one (days × tickers)
+price matrix:
+
+  R[d, t]   daily simple returns per holding
+  r_p[d]    returns of Σ_t P[d, t] · q[t]
+  r_b[d]    benchmark (SPY) returns
+
+  volatility  std(r_p) · √252
+  beta        cov(r_p, r_b) / var(r_b)         (per holding too)
+  sharpe      (mean(r_p) · 252 − RISK_FREE_RATE) / volatility
+  drawdown    min(V / running_max(V) − 1)
+  correlation corrcoef(R)
+
+Results are cached per (user, range, last settled close): a new EOD
+close moves to a new key, and lot changes delete the user's keys. When
+stored closes fall short of the range (upstream failing or throttled),
+the window shrinks to what is stored, `partial` is set and the result is
+not cached.
+"""
+from __future__ import annotations
+
+import os
+from datetime import timedelta
+
+import numpy as np
+
+from ..ai.cache import TTLCache
+from ..ai.market import calendar
+from .eod_store import eod_store, last_closed_day
+from .valuation import asof_prices
+
+BENCHMARK = "SPY"
+TRADING_DAYS = 252
+RISK_FREE_RATE = float(os.environ.get("RISK_FREE_RATE", "0.04"))
+
+# ?range= → calendar days of history.
+ANALYTICS_RANGES = {"3M": 92, "6M": 183, "1Y": 366, "3Y": 3 * 366, "5Y": 5 * 366}
+
+_cache = TTLCache(ttl_seconds=86400, max_entries=1024, namespace="analytics")
+
+
+def _key(user_id: str, range_: str) -> str:
+    return f"{user_id}:{range_}:{last_closed_day().isoformat()}"
+
+
+def invalidate(user_id: str) -> None:
+    """Drop a user's cached analytics (call after any lot change)."""
+    for range_ in ANALYTICS_RANGES:
+        _cache.delete(_key(user_id, range_))
+
+
+def _num(x) -> float | None:
+    x = float(x)
+    return None if np.isnan(x) or np.isinf(x) else x
+
+
+def _returns(prices: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return prices[1:] / prices[:-1] - 1.0
+
+
+def compute(holdings: dict[str, float], range_: str = "1Y") -> dict:
+    """Analytics for {ticker: shares} over `range_` (see ANALYTICS_RANGES)."""
+    end = last_closed_day()
+    requested = start = end - timedelta(days=ANALYTICS_RANGES[range_])
+    tickers = sorted(t for t, q in holdings.items() if q > 0)
+    universe = tickers + ([BENCHMARK] if BENCHMARK not in tickers else [])
+    # A week of lead-in so the first day has a close to carry forward.
+    closes, short = eod_store.closes_checked(universe, start - timedelta(days=7), end)
+    # Don't pad history that couldn't be fetched with carried-forward
+    # prices: narrow the window to the span every ticker has stored.
+    for span in short.values():
+        if span is not None:
+            start, end = max(start, span[0]), min(end, span[1])
+    days = calendar.trading_days(start, end)
+    prices = asof_prices(days, universe, closes)
+
+    # Holdings listed after the window opened are flat until their first
+    # close (zero return) rather than dropping whole days; holdings with
+    # no closes at all are left out and reported.
+    valid = ~np.isnan(prices)
+    has_data = valid.any(axis=0)
+    first = valid.argmax(axis=0)
+    prices = np.where(valid, prices, prices[first, np.arange(prices.shape[1])])
+
+    held = [j for j, t in enumerate(universe[:len(tickers)]) if has_data[j]]
+    bench = universe.index(BENCHMARK)
+    missing = [universe[j] for j in range(len(tickers)) if not has_data[j]]
+    out = {
+        "range": range_,
+        "requested_start": requested.isoformat(),
+        "start": days[0].isoformat() if days else None,
+        "end": days[-1].isoformat() if days else None,
+        "benchmark": BENCHMARK,
+        "tickers": [universe[j] for j in held],
+        "missing": missing,
+        "partial": bool(short or missing),
+        "observations": max(len(days) - 1, 0),
+    }
+    if len(days) < 3 or not held:
+        return {**out, "volatility": None, "beta": None, "sharpe": None,
+                "annual_return": None, "max_drawdown": None, "positions": [], "correlation": []}
+
+    shares = np.array([holdings[universe[j]] for j in held], dtype=np.float64)
+    P = prices[:, held]
+    R = _returns(P)
+    value = P @ shares
+    r_p = _returns(value)
+    r_b = _returns(prices[:, bench]) if has_data[bench] else None
+
+    vol = np.std(r_p, ddof=1) * np.sqrt(TRADING_DAYS)
+    annual = np.mean(r_p) * TRADING_DAYS
+    sharpe = (annual - RISK_FREE_RATE) / vol if vol > 0 else np.nan
+
+    betas = np.full(len(held), np.nan)
+    beta = np.nan
+    if r_b is not None:
+        rb = r_b - r_b.mean()
+        var_b = rb @ rb
+        if var_b > 0:
+            beta = ((r_p - r_p.mean()) @ rb) / var_b
+            betas = ((R - R.mean(axis=0)).T @ rb) / var_b
+
+    peak = np.maximum.accumulate(value)
+    drawdown = value / peak - 1.0
+    trough = int(np.argmin(drawdown))
+    top = int(np.argmax(value[:trough + 1]))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.corrcoef(R, rowvar=False) if len(held) > 1 else np.ones((1, 1))
+    corr = np.atleast_2d(corr)
+    vols = np.std(R, axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+    weights = P[-1] * shares / value[-1] if value[-1] else np.zeros(len(held))
+
+    return {
+        **out,
+        "volatility": _num(vol),
+        "annual_return": _num(annual),
+        "beta": _num(beta),
+        "sharpe": _num(sharpe),
+        "risk_free_rate": RISK_FREE_RATE,
+        "max_drawdown": {
+            "value": _num(drawdown[trough]),
+            "peak": days[top].isoformat(),
+            "trough": days[trough].isoformat(),
+        },
+        "positions": [
+            {"ticker": universe[j], "weight": _num(w), "volatility": _num(v), "beta": _num(b)}
+            for j, w, v, b in zip(held, weights, vols, betas)
+        ],
+        "correlation": [[_num(x) for x in row] for row in corr],
+    }
+
+
+def portfolio_analytics(user_id: str, holdings: dict[str, float], range_: str = "1Y") -> dict:
+    """`compute`, cached per user and range until the next close or lot change."""
+    key = _key(user_id, range_)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    result = compute(holdings, range_)
+    if not result["partial"]:
+        _cache.set(key, result)
+    return result
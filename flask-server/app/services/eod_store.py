@@ -0,0 +1,285 @@
+"""
+Persistent end-of-day close prices.
+
+Daily closes never change once the session is over, so they live in
+SQLite next to the user data instead of being re-fetched from Finnhub on
+every portfolio view:
+
+  eod_prices(ticker, date, close)           PRIMARY KEY (ticker, date)
+  eod_coverage(ticker, first_date, last_date)
+
+`eod_coverage` records the span already filled per ticker — weekends,
+holidays and halts leave no rows, so the prices table alone can't say
+whether a gap was fetched. Reads fill only the missing edges of that
+span (one upstream call per edge); a background job extends every held
+or previously-seen ticker once per trading day, after the close, under
+the BACKGROUND budget class.
+
+A first touch backfills ~13 months at once — the same single call as 30
+days — so history and analytics ranges are served locally afterwards.
+
+An edge that fails, or that has no bars yet, is not asked again for
+_MISS_TTL_S, so reads during an outage don't each go upstream. An empty
+answer for a span before the ticker's first stored close means it wasn't
+listed yet: coverage extends over it and it is never asked again.
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+from ..ai.market import NY, calendar
+from ..ai.sources import budget
+from ..ai.sources.finnhub import FinnhubSource
+from ..config import get_db_path
+
+log = logging.getLogger("tickr.eod")
+
+_INITIAL_DAYS = 400
+_SETTLE_S = 30 * 60        # wait this long after the close before trusting a daily bar
+_JOB_CHECK_S = 30 * 60
+_MISS_TTL_S = 10 * 60       # don't re-ask a failed / empty edge before this
+_NO_BARS = {"t": [], "c": []}
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS eod_prices (
+        ticker TEXT NOT NULL,
+        date TEXT NOT NULL,
+        close REAL NOT NULL,
+        PRIMARY KEY (ticker, date)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS eod_coverage (
+        ticker TEXT PRIMARY KEY,
+        first_date TEXT NOT NULL,
+        last_date TEXT NOT NULL
+    )
+    """,
+)
+
+
+def ensure_schema(cursor) -> None:
+    for stmt in _SCHEMA:
+        cursor.execute(stmt)
+
+
+def last_closed_day(now: float | None = None) -> date:
+    """Latest trading day whose close has settled."""
+    now = time.time() if now is None else now
+    day = calendar.last_trading_day(now)
+    closed_at = datetime.combine(day, calendar.session_close(day), tzinfo=NY).timestamp() + _SETTLE_S
+    if now < closed_at:
+        day = calendar.trading_days(day - timedelta(days=10), day - timedelta(days=1))[-1]
+    return day
+
+
+class EODStore:
+    def __init__(self, db_path: str | None = None):
+        self._db_path = db_path
+        self._locks: dict[str, threading.Lock] = {}
+        self._meta_lock = threading.Lock()
+        self._schema_ready = False
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="eod-backfill")
+        self._job_started = False
+        self._last_job_day: date | None = None
+        # (ticker, "first" | "last") → time before which that edge isn't re-fetched.
+        self._misses: dict[tuple[str, str], float] = {}
+        self._stats = {"upstream_calls": 0, "rows_written": 0, "job_runs": 0, "miss_skips": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path or get_db_path(), timeout=10.0)
+        if not self._schema_ready:
+            ensure_schema(conn.cursor())
+            conn.commit()
+            self._schema_ready = True
+        return conn
+
+    def _ticker_lock(self, ticker: str) -> threading.Lock:
+        with self._meta_lock:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    # ── Backfill ──
+
+    def _fetch(self, ticker: str, start: date, end: date) -> list[tuple[str, float]] | None:
+        """Closes in [start, end] ([] if upstream has none), or None if upstream failed."""
+        from_ts = int(datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc).timestamp())
+        to_ts = int(datetime.combine(end, datetime.max.time(), tzinfo=timezone.utc).timestamp())
+        self._stats["upstream_calls"] += 1
+        data = FinnhubSource.candles(ticker, "D", from_ts, to_ts, no_data=_NO_BARS)
+        if data is None:
+            return None
+        out = []
+        for ts, close in zip(data["t"], data["c"]):
+            d = datetime.fromtimestamp(ts, tz=timezone.utc).date()
+            if start <= d <= end and close is not None:
+                out.append((d.isoformat(), float(close)))
+        return out
+
+    def fill(self, ticker: str, start: date, end: date) -> None:
+        """Make [start, end] present for `ticker`; only missing edges go upstream."""
+        end = min(end, last_closed_day())
+        if start > end:
+            return
+        with self._ticker_lock(ticker):
+            conn = self._connect()
+            try:
+                cur = conn.cursor()
+                cur.execute("SELECT first_date, last_date FROM eod_coverage WHERE ticker = ?", (ticker,))
+                row = cur.fetchone()
+                if row is None:
+                    start = min(start, end - timedelta(days=_INITIAL_DAYS))
+                    new_first = new_last = None
+                    gaps = [("last", start, end)]
+                else:
+                    new_first, new_last = date.fromisoformat(row[0]), date.fromisoformat(row[1])
+                    gaps = []
+                    if start < new_first:
+                        gaps.append(("first", start, new_first - timedelta(days=1)))
+                    if end > new_last:
+                        gaps.append(("last", new_last + timedelta(days=1), end))
+                if not gaps:
+                    return
+
+                now = time.time()
+                for edge, lo, hi in gaps:
+                    if self._misses.get((ticker, edge), 0) > now:
+                        self._stats["miss_skips"] += 1
+                        continue
+                    closes = self._fetch(ticker, lo, hi)
+                    if closes is None:
+                        log.warning("EOD backfill %s %s..%s failed; will retry", ticker, lo, hi)
+                        self._misses[(ticker, edge)] = now + _MISS_TTL_S
+                        continue
+                    if not closes:
+                        if edge == "first" and new_first is not None:
+                            # Nothing before a stored close: not listed yet.
+                            new_first = lo
+                        else:
+                            # Nothing posted yet — leave the gap to retry.
+                            self._misses[(ticker, edge)] = now + _MISS_TTL_S
+                        continue
+                    self._misses.pop((ticker, edge), None)
+                    cur.executemany(
+                        "INSERT OR REPLACE INTO eod_prices (ticker, date, close) VALUES (?, ?, ?)",
+                        [(ticker, d, c) for d, c in closes],
+                    )
+                    self._stats["rows_written"] += len(closes)
+                    # Coverage only advances as far as what actually came
+                    # back; a missing latest close is fetched again later.
+                    # The lower edge covers the gap start (no bars before
+                    # a listing date is a real answer, not a hole).
+                    got_last = date.fromisoformat(max(d for d, _ in closes))
+                    new_first = lo if new_first is None else min(new_first, lo)
+                    new_last = got_last if new_last is None else max(new_last, got_last)
+                if new_first is not None:
+                    cur.execute(
+                        "INSERT INTO eod_coverage (ticker, first_date, last_date) VALUES (?, ?, ?) "
+                        "ON CONFLICT(ticker) DO UPDATE SET first_date = excluded.first_date, "
+                        "last_date = excluded.last_date",
+                        (ticker, new_first.isoformat(), new_last.isoformat()),
+                    )
+                conn.commit()
+            finally:
+                conn.close()
+
+    # ── Reads ──
+
+    def closes(self, tickers: list[str], start: date, end: date) -> dict[str, dict[str, float]]:
+        """{ticker: {YYYY-MM-DD: close}} for [start, end], filling gaps first."""
+        return self.closes_checked(tickers, start, end)[0]
+
+    def closes_checked(
+        self, tickers: list[str], start: date, end: date
+    ) -> tuple[dict[str, dict[str, float]], dict[str, tuple[date, date] | None]]:
+        """
+        `closes`, plus {ticker: stored (first, last) coverage} for every
+        ticker whose coverage still falls short of [start, end] after the
+        fill — None when nothing is stored for it at all.
+        """
+        tickers = sorted({t.upper() for t in tickers if t})
+        list(self._pool.map(lambda t: self._safe_fill(t, start, end), tickers))
+        out: dict[str, dict[str, float]] = {t: {} for t in tickers}
+        if not tickers:
+            return out, {}
+        conn = self._connect()
+        try:
+            marks = ",".join("?" * len(tickers))
+            rows = conn.execute(
+                f"SELECT ticker, date, close FROM eod_prices "
+                f"WHERE ticker IN ({marks}) AND date BETWEEN ? AND ? ORDER BY ticker, date",
+                (*tickers, start.isoformat(), end.isoformat()),
+            ).fetchall()
+            coverage = {
+                t: (date.fromisoformat(first), date.fromisoformat(last))
+                for t, first, last in conn.execute(
+                    f"SELECT ticker, first_date, last_date FROM eod_coverage WHERE ticker IN ({marks})",
+                    tickers,
+                )
+            }
+        finally:
+            conn.close()
+        for ticker, d, close in rows:
+            out[ticker][d] = close
+        end = min(end, last_closed_day())
+        if start > end:
+            return out, {}
+        short = {}
+        for t in tickers:
+            span = coverage.get(t)
+            if span is None or span[0] > start or span[1] < end:
+                short[t] = span
+        return out, short
+
+    def _safe_fill(self, ticker: str, start: date, end: date) -> None:
+        try:
+            self.fill(ticker, start, end)
+        except Exception:  # noqa: BLE001 — serve whatever is stored
+            log.exception("EOD backfill failed for %s", ticker)
+
+    # ── Daily job ──
+
+    def start(self) -> None:
+        """Idempotent. Extends every known ticker once per trading day."""
+        with self._meta_lock:
+            if self._job_started:
+                return
+            self._job_started = True
+        threading.Thread(target=self._run, name="eod-backfill-job", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                day = last_closed_day()
+                if day != self._last_job_day:
+                    self.run_once(day)
+                    self._last_job_day = day
+            except Exception:  # noqa: BLE001 — keep the job alive
+                log.exception("EOD backfill job failed")
+            time.sleep(_JOB_CHECK_S)
+
+    def run_once(self, day: date | None = None) -> None:
+        day = day or last_closed_day()
+        conn = self._connect()
+        try:
+            tickers = [r[0] for r in conn.execute(
+                "SELECT DISTINCT ticker FROM holdings UNION SELECT ticker FROM eod_coverage"
+            )]
+        finally:
+            conn.close()
+        with budget.priority(budget.BACKGROUND):
+            for ticker in tickers:
+                self._safe_fill(ticker, day, day)
+        self._stats["job_runs"] += 1
+        log.info("EOD backfill through %s for %d tickers", day, len(tickers))
+
+    def stats(self) -> dict:
+        return {**self._stats, "last_job_day": self._last_job_day and self._last_job_day.isoformat()}
+
+
+eod_store = EODStore()
@@ -0,0 +1,98 @@
+"""
+Parsing and validation for bulk lot imports (`POST /portfolio/import`).
+
+Rows are validated as they're read — a CSV upload is consumed line by
+line from the request stream and never held as text — and each yields
+either a lot `(ticker, quantity, price, purchase_date)` or an error for
+that row. The route inserts the lots in one transaction, or nothing if
+any row was rejected.
+
+Accepted columns (case-insensitive; brokerage-export aliases in parens):
+  ticker (symbol), quantity (shares, qty), price (cost, avg_price),
+  date (purchase_date, trade_date) — date optional, defaults to today.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import math
+import re
+from datetime import date, datetime
+from typing import Iterable, Iterator
+
+MAX_ROWS = 5000
+
+_TICKER = re.compile(r"^[A-Z0-9][A-Z0-9.\-]{0,9}$")
+_ALIASES = {
+    "ticker": "ticker", "symbol": "ticker",
+    "quantity": "quantity", "shares": "quantity", "qty": "quantity",
+    "price": "price", "cost": "price", "avg_price": "price",
+    "date": "date", "purchase_date": "date", "trade_date": "date",
+}
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y")
+
+
+def validate_lot(row: dict, today: date | None = None) -> tuple[str, int, float, str]:
+    """One lot from a row of raw values. Raises ValueError with a user-facing message."""
+    today = today or date.today()
+    ticker = str(row.get("ticker") or "").strip().upper()
+    if not _TICKER.match(ticker):
+        raise ValueError("Invalid ticker")
+
+    try:
+        quantity = float(str(row.get("quantity")).replace(",", ""))
+        price = float(str(row.get("price")).replace(",", "").lstrip("$"))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid quantity or price") from None
+    if not (math.isfinite(quantity) and math.isfinite(price)) or quantity <= 0 or price <= 0:
+        raise ValueError("Invalid quantity or price")
+    if not quantity.is_integer():
+        raise ValueError("Fractional quantities are not supported")
+
+    raw_date = str(row.get("date") or "").strip()
+    if not raw_date:
+        purchase_date = today
+    else:
+        for fmt in _DATE_FORMATS:
+            try:
+                purchase_date = datetime.strptime(raw_date, fmt).date()
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("Invalid date format")
+    if purchase_date > today:
+        raise ValueError("Purchase date cannot be in the future")
+
+    return ticker, int(quantity), price, purchase_date.isoformat()
+
+
+def _normalize(row: dict) -> dict:
+    return {_ALIASES.get((k or "").strip().lower(), k): v for k, v in row.items()}
+
+
+def iter_rows(rows: Iterable[dict], today: date | None = None) -> Iterator[tuple[int, tuple | None, str | None]]:
+    """(row number, lot, error) for each row; exactly one of lot/error is set."""
+    today = today or date.today()
+    for n, row in enumerate(rows, start=1):
+        if n > MAX_ROWS:
+            yield n, None, f"Too many rows (max {MAX_ROWS})"
+            return
+        if not isinstance(row, dict):
+            yield n, None, "Expected an object"
+            continue
+        try:
+            yield n, validate_lot(_normalize(row), today), None
+        except ValueError as e:
+            yield n, None, str(e)
+
+
+def csv_rows(stream) -> Iterator[dict]:
+    """Rows of a CSV byte stream, decoded incrementally (BOM tolerated)."""
+    lines = codecs.iterdecode(stream, "utf-8-sig")
+    try:
+        for row in csv.DictReader(lines):
+            if any((v or "").strip() for v in row.values() if isinstance(v, str)):
+                yield row
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV: {e}") from None
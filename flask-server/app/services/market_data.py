@@ -6,26 +6,45 @@ users browsing AAPL hit Finnhub once, not ten thousand times.
 
 Design:
   - Stale-while-revalidate TTL cache (shared across requests via in-memory
-    dict + threading.Lock; swap for Redis in clustered deploys).
+    dict + threading.Lock; CACHE_BACKEND adds a Redis/SQLite tier shared
+    across workers and nodes).
   - Quote TTL is short during open hours, long when closed.
+  - While the market is trading, quotes come from the push-fed quote
+    table (see quote_stream) and never touch the network.
   - Movers endpoint pulls a curated universe and batches quote fetches.
+  - Batch quote API answers from cache first and fans misses out over a
+    small bounded pool, returning whatever landed by the deadline.
   - All upstream errors degrade to "last good value" (the stale cache) and
     surface a `stale: true` flag so the UI can dim numbers if it wants.
 """
 from __future__ import annotations
 
+import contextvars
 import logging
+from array import array
 import threading
 import time
-from datetime import datetime, timezone
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
 from typing import Any, Callable
 
-from ..ai.market import NY, market_state, last_trading_day, session_bounds
+from ..ai.market import NY, calendar, market_state, last_trading_day, session_bounds
+from ..ai.sources import budget
+from ..cache_backends import shared_backend
 from ..ai.sources.finnhub import FinnhubSource
+from .downsample import lttb
+from .quote_stream import quote_stream
 
 
 log = logging.getLogger("tickr.market")
 
+# A failed cold fetch is remembered this long (no stale window) so a
+# dead upstream isn't hammered — never for a session-aligned TTL.
+_NEGATIVE_TTL = 15
+
 
 # ────── SWR cache ────────────────────────────────────────────────────
 
@@ -37,21 +56,138 @@ class SWRCache:
       - fresh (within fresh_ttl)     → cache hit
       - stale (within stale_ttl)     → return stale, refresh in background
       - missing/expired              → block and fetch
+
+    Bounded: entries are kept in LRU order and the least recently used
+    is evicted past `max_entries` (intraday keys embed the trading date,
+    so an unbounded store grows forever). Per-key fetch locks are
+    refcounted and dropped once nobody holds them. Background refreshes
+    run on a fixed-size pool with a queue cap; a key already queued is
+    never queued twice.
+
+    With a shared CACHE_BACKEND the local store is an L1: entries are
+    written through, local misses consult the shared store, and cold
+    fetches / refreshes take a cross-process lock so only one worker
+    hits upstream per key.
+
+    A cold fetch that fails is cached as None for `_NEGATIVE_TTL` only,
+    whatever TTL the caller asked for, and `peek` doesn't count it.
     """
 
-    def __init__(self):
-        self._store: dict[str, dict] = {}
-        self._locks: dict[str, threading.Lock] = {}
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        refresh_workers: int = 4,
+        refresh_queue_max: int = 256,
+        namespace: str = "swr",
+    ):
+        self._ns = namespace
+        self._store: OrderedDict[str, dict] = OrderedDict()
+        self._max = max_entries
+        self._locks: dict[str, list] = {}          # key → [Lock, refcount]
         self._refreshing: set[str] = set()
         self._meta_lock = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="swr-refresh",
+        )
+        self._refresh_queue_max = refresh_queue_max
+        self._warm_loader = None
+        self._stats = {
+            "hits": 0, "stale_hits": 0, "blocking_fetches": 0,
+            "refreshes": 0, "refresh_dropped": 0, "evictions": 0,
+        }
+
+    # ── Store primitives (all under _meta_lock) ──
+
+    def _get(self, key: str) -> dict | None:
+        with self._meta_lock:
+            entry = self._store.get(key)
+            if entry is not None:
+                self._store.move_to_end(key)
+            return entry
+
+    def _adopt(self, key: str, entry: dict) -> None:
+        with self._meta_lock:
+            self._store[key] = entry
+            self._store.move_to_end(key)
+            while len(self._store) > self._max:
+                self._store.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _put(self, key: str, value: Any, fresh_ttl: int, stale_ttl: int) -> None:
+        now = time.time()
+        entry = {
+            "value": value,
+            "fresh_until": now + fresh_ttl,
+            "stale_until": now + fresh_ttl + stale_ttl,
+            "updated": now,
+        }
+        self._adopt(key, entry)
+        shared = shared_backend()
+        if shared is not None:
+            shared.set(f"{self._ns}:{key}", entry, max(1, fresh_ttl + stale_ttl))
+
+    def _newer_remote(self, key: str, entry: dict | None) -> dict | None:
+        """Shared-store entry for `key` if it beats the local one."""
+        shared = shared_backend()
+        if shared is None:
+            return None
+        remote = shared.get(f"{self._ns}:{key}")
+        if remote and (entry is None or remote["updated"] > entry["updated"]):
+            self._adopt(key, remote)
+            return remote
+        return None
+
+    # ── Warm start (app.cache_snapshot) ──
+
+    def attach_warm(self, loader) -> None:
+        """`loader()` → [(key, entry)], applied lazily on first use."""
+        self._warm_loader = loader
 
-    def _lock_for(self, key: str) -> threading.Lock:
+    def _warm(self) -> None:
+        if self._warm_loader is None:
+            return
         with self._meta_lock:
-            lock = self._locks.get(key)
-            if not lock:
-                lock = threading.Lock()
-                self._locks[key] = lock
-            return lock
+            loader, self._warm_loader = self._warm_loader, None
+        if loader is None:
+            return
+        now = time.time()
+        with self._meta_lock:
+            # Saved oldest-first; restored entries rank behind anything live.
+            for key, entry in reversed(loader()):
+                if entry["stale_until"] > now and key not in self._store:
+                    self._store[key] = entry
+                    self._store.move_to_end(key, last=False)
+            while len(self._store) > self._max:
+                self._store.popitem(last=False)
+
+    def snapshot_items(self) -> list[tuple[str, dict]]:
+        self._warm()
+        now = time.time()
+        with self._meta_lock:
+            return [(k, e) for k, e in self._store.items() if e["stale_until"] > now]
+
+    def _count(self, stat: str) -> None:
+        with self._meta_lock:
+            self._stats[stat] += 1
+
+    @contextmanager
+    def _key_lock(self, key: str):
+        """Single-flight lock for `key`; forgotten once the last holder leaves."""
+        with self._meta_lock:
+            slot = self._locks.get(key)
+            if slot is None:
+                slot = self._locks[key] = [threading.Lock(), 0]
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._meta_lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    self._locks.pop(key, None)
+
+    # ── Public API ──
 
     def get_or_fetch(
         self,
@@ -61,54 +197,92 @@ class SWRCache:
         stale_ttl: int = 0,
     ) -> tuple[Any, bool]:
         """Returns (value, is_stale)."""
+        self._warm()
         now = time.time()
-        entry = self._store.get(key)
+        entry = self._get(key)
+        if not entry or entry["fresh_until"] <= now:
+            # Another worker may already have fetched it.
+            entry = self._newer_remote(key, entry) or entry
 
         if entry and entry["fresh_until"] > now:
+            self._count("hits")
             return entry["value"], False
 
         if entry and entry["stale_until"] > now:
-            # Trigger async refresh, return stale immediately
-            if key not in self._refreshing:
-                self._refreshing.add(key)
-                threading.Thread(
-                    target=self._refresh,
-                    args=(key, fetcher, fresh_ttl, stale_ttl),
-                    daemon=True,
-                ).start()
+            self._count("stale_hits")
+            self._schedule_refresh(key, fetcher, fresh_ttl, stale_ttl)
             return entry["value"], True
 
-        # Cold or fully expired → block on a single fetch (thundering-herd safe)
-        with self._lock_for(key):
-            entry = self._store.get(key)
-            now = time.time()
-            if entry and entry["fresh_until"] > now:
+        # Cold or fully expired → block on a single fetch (thundering-herd
+        # safe within this process, and across processes when shared).
+        with self._key_lock(key), self._shared_lock(key):
+            entry = self._get(key)
+            entry = self._newer_remote(key, entry) or entry
+            if entry and entry["fresh_until"] > time.time():
+                self._count("hits")
                 return entry["value"], False
+            self._count("blocking_fetches")
             value = self._fetch_safe(fetcher)
-            if value is None and entry is not None:
-                return entry["value"], True  # serve last good even if expired
-            self._store[key] = {
-                "value": value,
-                "fresh_until": now + fresh_ttl,
-                "stale_until": now + fresh_ttl + stale_ttl,
-                "updated": now,
-            }
+            if value is None:
+                if entry is not None and entry["value"] is not None:
+                    return entry["value"], True  # serve last good even if expired
+                self._put(key, None, _NEGATIVE_TTL, 0)
+                return None, False
+            self._put(key, value, fresh_ttl, stale_ttl)
             return value, False
 
+    @contextmanager
+    def _shared_lock(self, key: str, wait: float = 10.0):
+        shared = shared_backend()
+        if shared is None:
+            yield True
+            return
+        with shared.lock(f"{self._ns}:{key}", ttl=30.0, wait=wait) as held:
+            yield held
+
+    def peek(self, key: str) -> dict | None:
+        """Entry if it can be served without blocking (fresh or stale)."""
+        self._warm()
+        with self._meta_lock:
+            entry = self._store.get(key)
+        if entry and entry["value"] is not None and entry["stale_until"] > time.time():
+            return entry
+        return None
+
+    def latest(self, key: str) -> Any:
+        """Last stored value for `key`, however old — for incremental fetchers."""
+        self._warm()
+        with self._meta_lock:
+            entry = self._store.get(key)
+        return entry["value"] if entry else None
+
+    def _schedule_refresh(self, key, fetcher, fresh_ttl, stale_ttl) -> None:
+        with self._meta_lock:
+            if key in self._refreshing:
+                return
+            if len(self._refreshing) >= self._refresh_queue_max:
+                self._stats["refresh_dropped"] += 1
+                return
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+        self._refresh_pool.submit(self._refresh, key, fetcher, fresh_ttl, stale_ttl)
+
     def _refresh(self, key, fetcher, fresh_ttl, stale_ttl):
         try:
-            value = self._fetch_safe(fetcher)
-            if value is None:
-                return
-            now = time.time()
-            self._store[key] = {
-                "value": value,
-                "fresh_until": now + fresh_ttl,
-                "stale_until": now + fresh_ttl + stale_ttl,
-                "updated": now,
-            }
+            with self._shared_lock(key, wait=0) as held:
+                if not held:
+                    return   # another worker is already revalidating
+                if self._newer_remote(key, self._get(key)):
+                    return
+                # Nobody is waiting on a revalidation — yield to user traffic.
+                with budget.priority(budget.BACKGROUND):
+                    value = self._fetch_safe(fetcher)
+                if value is None:
+                    return
+                self._put(key, value, fresh_ttl, stale_ttl)
         finally:
-            self._refreshing.discard(key)
+            with self._meta_lock:
+                self._refreshing.discard(key)
 
     @staticmethod
     def _fetch_safe(fetcher):
@@ -118,43 +292,91 @@ class SWRCache:
             log.exception("Cache fetcher failed; returning None")
             return None
 
+    def stats(self) -> dict:
+        with self._meta_lock:
+            return {
+                **self._stats,
+                "entries": len(self._store),
+                "max_entries": self._max,
+                "key_locks": len(self._locks),
+                "refresh_queue_depth": len(self._refreshing),
+            }
+
     def clear(self):
-        self._store.clear()
+        with self._meta_lock:
+            self._warm_loader = None   # a pending snapshot must not refill it
+            self._store.clear()
 
 
 _cache = SWRCache()
 
 
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
 # ────── TTL policy ───────────────────────────────────────────────────
 
-def _quote_ttl() -> tuple[int, int]:
+def _aligned(fresh: int, stale: int, closed_stale: int | None = None) -> tuple[int, int]:
+    """
+    Clip `fresh` to the next session transition so nothing cached during
+    one state is served as fresh in the next (a pre-market quote must not
+    outlive the open). While closed nothing moves until the next
+    transition, so the entry stays fresh right up to it.
+    """
+    state = calendar.state_at()
+    until = max(1, int(calendar.seconds_to_transition()))
+    if state == "closed":
+        return until, stale if closed_stale is None else closed_stale
+    return min(fresh, until), stale
+
+
+def _quote_ttl(state: str | None = None) -> tuple[int, int]:
     """(fresh_ttl, stale_ttl) for live quotes."""
-    state = market_state()["state"]
-    if state == "open":      return (15, 60)        # very fresh during open
-    if state in ("pre", "after"): return (30, 120)
-    return (300, 3600)                              # closed: ~5min fresh, 1hr stale ok
+    state = state or calendar.state_at()
+    if state == "open":      return _aligned(15, 60)        # very fresh during open
+    if state in ("pre", "after"): return _aligned(30, 120)
+    return _aligned(300, 3600)                              # closed: fresh until pre-market
 
 
 def _intraday_ttl() -> tuple[int, int]:
-    state = market_state()["state"]
-    if state == "open":      return (60, 300)
-    if state in ("pre", "after"): return (120, 600)
-    return (1800, 86400)
+    state = calendar.state_at()
+    if state == "open":      return _aligned(60, 300)
+    if state in ("pre", "after"): return _aligned(120, 600)
+    return _aligned(1800, 86400)
 
 
 # ────── Public service API ───────────────────────────────────────────
 
-def get_quote(ticker: str) -> dict | None:
-    """Cached Finnhub quote with derived change / change_percent."""
+def get_quote(ticker: str, watch: bool = False) -> dict | None:
+    """
+    Cached Finnhub quote with derived change / change_percent.
+
+    `watch` leases the ticker on the live trade stream. Only holdings and
+    SSE subscribers pass it: the stream has a small symbol cap, so
+    anonymous lookups and the movers universe stay on the REST path.
+    """
     ticker = (ticker or "").upper().strip()
     if not ticker:
         return None
-    fresh, stale = _quote_ttl()
+    state = calendar.state_at()
+    if watch:
+        quote_stream.watch(ticker)
+    if state != "closed":
+        live = quote_stream.quote(ticker)
+        if live is not None:
+            return _shape_quote(ticker, live, False)
+    fresh, stale = _quote_ttl(state)
     raw, is_stale = _cache.get_or_fetch(
         f"quote:{ticker}",
         lambda: FinnhubSource.quote(ticker),
         fresh, stale,
     )
+    quote_stream.seed(ticker, raw)
+    return _shape_quote(ticker, raw, is_stale)
+
+
+def _shape_quote(ticker: str, raw: dict | None, is_stale: bool) -> dict | None:
     if not raw:
         return None
     current = raw.get("c")
@@ -175,52 +397,384 @@ def get_quote(ticker: str) -> dict | None:
     }
 
 
-def get_intraday(ticker: str) -> dict:
-    """Cached intraday 5-min bars for the most recent trading day."""
+# Misses in a batch are fetched on a small shared pool. Its size is the
+# cap on concurrent upstream quote calls from batch paths — kept well
+# under the HTTP pool size and gentle on Finnhub's per-second limits.
+_FANOUT_WORKERS = 6
+_fanout = ThreadPoolExecutor(max_workers=_FANOUT_WORKERS, thread_name_prefix="quote-fanout")
+
+
+def _normalize_tickers(tickers) -> list[str]:
+    wanted: list[str] = []
+    for t in tickers or []:
+        t = (t or "").upper().strip()
+        if t and t not in wanted:
+            wanted.append(t)
+    return wanted
+
+
+def _gather(jobs, deadline: float) -> dict:
+    """
+    Run `(key, fn, cached)` jobs. Cached ones are called inline (they never
+    block); the rest go to the fan-out pool and are awaited together.
+    Keys whose job hasn't finished by `deadline` are absent from the
+    result — the work keeps running and warms the cache.
+    """
+    out: dict = {}
+    pending = {}
+    for key, fn, cached in jobs:
+        if cached:
+            out[key] = fn()
+        else:
+            # Carry the caller's budget priority onto the pool thread.
+            ctx = contextvars.copy_context()
+            pending[_fanout.submit(ctx.run, fn)] = key
+
+    if pending:
+        done, _ = wait(pending, timeout=deadline)
+        for fut in done:
+            try:
+                out[pending[fut]] = fut.result()
+            except Exception:  # noqa: BLE001
+                log.exception("Batch fetch failed for %s", pending[fut])
+        if len(done) < len(pending):
+            log.info("Batch fetch: %d/%d misses past %.1fs deadline",
+                     len(pending) - len(done), len(pending), deadline)
+    return out
+
+
+def _quote_cached(ticker: str) -> bool:
+    return quote_stream.quote(ticker) is not None or _cache.peek(f"quote:{ticker}") is not None
+
+
+def get_quotes(tickers, deadline: float = 6.0, watch: bool = False) -> dict[str, dict | None]:
+    """
+    Batch `get_quote`. Cached symbols (fresh or stale) are answered
+    inline; misses are fetched concurrently. Anything that hasn't landed
+    within `deadline` seconds maps to None — its fetch keeps running and
+    warms the cache for the next call.
+    """
+    wanted = _normalize_tickers(tickers)
+    out = _gather(
+        [(t, partial(get_quote, t, watch), _quote_cached(t)) for t in wanted],
+        deadline,
+    )
+    return {t: out.get(t) for t in wanted}
+
+
+def get_quote_board(tickers, points: int = 0, deadline: float = 6.0) -> dict:
+    """
+    Quotes (and optionally sparklines) for many tickers in one pass —
+    every miss, quote or intraday, is fanned out together so the whole
+    board costs one deadline, not two.
+
+    Returns {ticker: {"quote": dict | None, "sparkline": list | None}}.
+    """
+    wanted = _normalize_tickers(tickers)
+    day = last_trading_day().isoformat()
+    jobs = [(("q", t), partial(get_quote, t), _quote_cached(t)) for t in wanted]
+    if points:
+        jobs += [
+            (("s", t), partial(get_sparkline, t, points),
+             _cache.peek(_intraday_key(t, day)) is not None)
+            for t in wanted
+        ]
+    out = _gather(jobs, deadline)
+    return {
+        t: {"quote": out.get(("q", t)), "sparkline": out.get(("s", t))}
+        for t in wanted
+    }
+
+
+# Intraday bars are columnar: one typed array per field, shared by every
+# reader and never mutated in place (an update builds new arrays).
+BAR_FIELDS = ("t", "o", "h", "l", "c", "v")
+_BAR_TYPES = {"t": "q", "o": "d", "h": "d", "l": "d", "c": "d", "v": "q"}
+
+
+def _empty_bars() -> dict[str, array]:
+    return {f: array(_BAR_TYPES[f]) for f in BAR_FIELDS}
+
+
+def _intraday_key(ticker: str, day) -> str:
+    day = day if isinstance(day, str) else day.isoformat()
+    return f"bars5:{ticker}:{day}"
+
+
+def _merge_bars(prev: dict[str, array] | None, data: dict) -> dict[str, array]:
+    """`prev` with Finnhub candles `data` appended; overlapping bars are replaced."""
+    first = data["t"][0]
+    keep = 0
+    if prev:
+        # Bars from `first` on are re-fetched (the last one was still forming).
+        keep = next((i for i, ts in enumerate(prev["t"]) if ts >= first), len(prev["t"]))
+    out = _empty_bars()
+    for f in BAR_FIELDS:
+        if prev:
+            out[f].extend(prev[f][:keep])
+        if f in ("t", "v"):
+            out[f].extend(int(x) for x in data.get(f) or [0] * len(data["t"]))
+        else:
+            out[f].extend(round(float(x), 4) for x in data[f])
+    return out
+
+
+def _intraday_bars(ticker: str) -> tuple[dict[str, array] | None, bool, date]:
+    """(bars, is_stale, trading_day) — 5-min OHLCV for the latest session."""
     ticker = (ticker or "").upper().strip()
     fresh, stale = _intraday_ttl()
     day = last_trading_day()
     from_ts, to_ts = session_bounds(day)
+    key = _intraday_key(ticker, day)
 
     def _fetch():
-        data = FinnhubSource.candles(ticker, "5", from_ts, to_ts)
+        # Only ask for bars at or after the last one we hold.
+        prev = _cache.latest(key)
+        start = prev["t"][-1] if prev and len(prev["t"]) else from_ts
+        data = FinnhubSource.candles(ticker, "5", start, to_ts)
         if not data:
-            return None
-        out = []
-        for ts, close in zip(data["t"], data["c"]):
-            when = datetime.fromtimestamp(ts, tz=timezone.utc).astimezone(NY)
-            out.append({
-                "date": when.strftime("%H:%M"),
-                "ts": ts,
-                "price": round(float(close), 4),
-            })
-        return out
+            return prev   # nothing new (or upstream hiccup) — keep what we have
+        return _with_sparklines(_merge_bars(prev, data))
 
-    series, is_stale = _cache.get_or_fetch(
-        f"intraday:{ticker}:{day.isoformat()}",
-        _fetch, fresh, stale,
-    )
-    return {
-        "history": series or [],
+    bars, is_stale = _cache.get_or_fetch(key, _fetch, fresh, stale)
+    return bars, is_stale, day
+
+
+def bars_to_json(bars: dict[str, array] | None) -> dict[str, list]:
+    return {f: (bars[f].tolist() if bars else []) for f in BAR_FIELDS}
+
+
+def get_intraday(ticker: str, legacy: bool = False) -> dict:
+    """
+    Cached intraday 5-min bars for the most recent trading day, as
+    parallel arrays `bars: {t, o, h, l, c, v}`. `legacy=True` adds the
+    old `history: [{date, ts, price}]` list for clients that want it.
+    """
+    bars, is_stale, day = _intraday_bars(ticker)
+    out = {
+        "bars": bars_to_json(bars),
         "market": market_state(),
         "trading_day": day.isoformat(),
-        "source": "finnhub" if series else "none",
+        "source": "finnhub" if bars and len(bars["t"]) else "none",
         "stale": is_stale,
     }
+    if legacy:
+        out["history"] = [
+            {
+                "date": datetime.fromtimestamp(ts, tz=timezone.utc).astimezone(NY).strftime("%H:%M"),
+                "ts": ts,
+                "price": close,
+            }
+            for ts, close in zip(out["bars"]["t"], out["bars"]["c"])
+        ]
+    return out
+
+
+# Point counts the dashboard asks for; their LTTB sparklines are computed
+# once per intraday refresh and cached inside the series itself.
+_SPARK_POINTS = (8, 12, 16, 24, 32, 48)
+
+
+def _with_sparklines(bars: dict) -> dict:
+    bars["spark"] = {n: lttb(bars["t"], bars["c"], n) for n in _SPARK_POINTS}
+    return bars
 
 
 def get_sparkline(ticker: str, points: int = 24) -> list[float] | None:
-    """Short sparkline for dashboard cards — derived from intraday cache."""
-    data = get_intraday(ticker)
-    series = data.get("history") or []
-    if not series:
+    """Short LTTB sparkline for dashboard cards — a lookup on the intraday series."""
+    bars, _, _ = _intraday_bars(ticker)
+    if not bars or not len(bars["c"]):
         return None
-    prices = [p["price"] for p in series]
-    if len(prices) <= points:
-        return prices
-    # Downsample evenly
-    step = len(prices) / points
-    return [prices[int(i * step)] for i in range(points)]
+    if len(bars["c"]) <= points:
+        return bars["c"].tolist()
+    cached = (bars.get("spark") or {}).get(points)
+    return cached if cached is not None else lttb(bars["t"], bars["c"], points)
+
+
+# ────── History ranges (tiled candles) ───────────────────────────────
+
+# range → (resolution, lookback). 1D is the incremental intraday path;
+# 5D counts trading sessions, the rest are calendar days.
+HISTORY_RANGES = {
+    "1D": ("5", None),
+    "5D": ("15", 5),
+    "1M": ("60", 31),
+    "6M": ("D", 183),
+    "1Y": ("D", 366),
+    "5Y": ("W", 5 * 366),
+}
+
+# Candles are cached in fixed, epoch-aligned tiles per resolution, so
+# overlapping ranges from different users land on the same cache keys.
+_TILE_S = {
+    "15": 86400,
+    "60": 7 * 86400,
+    "D": 120 * 86400,
+    "W": 728 * 86400,
+}
+_PAST_TILE_TTL = (86400, 30 * 86400)   # closed tiles only change on corporate actions
+
+# Missing tiles being fetched right now: tile key → Future of its bars.
+# A request waits on tiles someone else is fetching rather than holding a
+# lock across the upstream call or fetching them a second time.
+_tile_flights: dict[str, Future] = {}
+_tile_flights_lock = threading.Lock()
+_TILE_WAIT_S = 10.0
+
+
+def _tile_key(ticker: str, resolution: str, start: int) -> str:
+    return f"tile:{resolution}:{ticker}:{start}"
+
+
+def _tile_starts(resolution: str, from_ts: int, to_ts: int) -> list[int]:
+    span = _TILE_S[resolution]
+    return list(range(from_ts - from_ts % span, to_ts + 1, span))
+
+
+def _tile_ttl(resolution: str, start: int) -> tuple[int, int]:
+    if start + _TILE_S[resolution] <= time.time():
+        return _PAST_TILE_TTL
+    return _intraday_ttl()
+
+
+def _split_tiles(resolution: str, run: list[int], data: dict | None) -> dict[int, dict]:
+    """One upstream payload covering `run` → bars per tile (empty where none)."""
+    span = _TILE_S[resolution]
+    tiles = {start: _empty_bars() for start in run}
+    if data:
+        for i, ts in enumerate(data["t"]):
+            bars = tiles.get(ts - ts % span)
+            if bars is None:
+                continue
+            bars["t"].append(int(ts))
+            for f in ("o", "h", "l", "c"):
+                bars[f].append(round(float(data[f][i]), 4))
+            bars["v"].append(int((data.get("v") or [0] * len(data["t"]))[i]))
+    return tiles
+
+
+def _fetch_tile_run(ticker: str, resolution: str, run: list[int]) -> dict[int, dict] | None:
+    span = _TILE_S[resolution]
+    from_ts, to_ts = run[0], min(run[-1] + span - 1, int(time.time()))
+    data = FinnhubSource.candles(ticker, resolution, from_ts, to_ts)
+    if data is None:
+        # `candles` can't tell "no bars" from "upstream failed": only trust
+        # an empty answer for spans with no trading session in them.
+        first = datetime.fromtimestamp(from_ts, NY).date()
+        last = datetime.fromtimestamp(to_ts, NY).date()
+        if calendar.trading_days(first, last):
+            return None
+    return _split_tiles(resolution, run, data)
+
+
+def _fetch_tile(ticker: str, resolution: str, start: int) -> dict | None:
+    return (_fetch_tile_run(ticker, resolution, [start]) or {}).get(start)
+
+
+def _runs(starts: list[int], span: int) -> list[list[int]]:
+    runs: list[list[int]] = []
+    for s in starts:
+        if runs and s - runs[-1][-1] == span:
+            runs[-1].append(s)
+        else:
+            runs.append([s])
+    return runs
+
+
+def get_candles(ticker: str, resolution: str, from_ts: int, to_ts: int) -> tuple[dict[str, array], bool]:
+    """
+    (bars, is_stale) for [from_ts, to_ts] assembled from cached tiles.
+    Missing tiles are fetched upstream in as few calls as possible (one
+    per contiguous run); cached tiles that went stale are served and
+    refreshed in the background.
+    """
+    ticker = (ticker or "").upper().strip()
+    span = _TILE_S[resolution]
+    starts = _tile_starts(resolution, from_ts, to_ts)
+    tiles: dict[int, dict] = {}
+    any_stale = False
+
+    missing = []
+    for start in starts:
+        key = _tile_key(ticker, resolution, start)
+        if _cache.peek(key) is None:
+            missing.append(start)
+            continue
+        fresh, stale = _tile_ttl(resolution, start)
+        bars, is_stale = _cache.get_or_fetch(
+            key, partial(_fetch_tile, ticker, resolution, start), fresh, stale,
+        )
+        tiles[start] = bars
+        any_stale |= is_stale
+
+    # Claim the missing tiles nobody is fetching yet; wait on the rest.
+    mine: dict[int, Future] = {}
+    theirs: dict[int, Future] = {}
+    with _tile_flights_lock:
+        for start in missing:
+            key = _tile_key(ticker, resolution, start)
+            entry = _cache.peek(key)   # landed since the first look
+            if entry is not None:
+                tiles[start] = entry["value"]
+            elif key in _tile_flights:
+                theirs[start] = _tile_flights[key]
+            else:
+                mine[start] = _tile_flights[key] = Future()
+    try:
+        for run in _runs(sorted(mine), span):
+            got = _fetch_tile_run(ticker, resolution, run) or {}
+            for start in run:
+                bars = got.get(start)
+                if bars is not None:
+                    _cache._put(_tile_key(ticker, resolution, start), bars, *_tile_ttl(resolution, start))
+                    tiles[start] = bars
+                mine[start].set_result(bars)
+    finally:
+        with _tile_flights_lock:
+            for start, fut in mine.items():
+                _tile_flights.pop(_tile_key(ticker, resolution, start), None)
+                if not fut.done():
+                    fut.set_result(None)   # fetch raised — waiters get nothing
+    for start, fut in theirs.items():
+        try:
+            bars = fut.result(timeout=_TILE_WAIT_S)
+        except FutureTimeout:
+            bars = None
+        if bars is not None:
+            tiles[start] = bars
+
+    out = _empty_bars()
+    for start in starts:
+        bars = tiles.get(start)
+        if not bars:
+            continue
+        for i, ts in enumerate(bars["t"]):
+            if from_ts <= ts <= to_ts:
+                for f in BAR_FIELDS:
+                    out[f].append(bars[f][i])
+    return out, any_stale
+
+
+def get_history(ticker: str, range_: str = "1D") -> dict:
+    """Bars for one of HISTORY_RANGES, in the same shape as get_intraday."""
+    resolution, lookback = HISTORY_RANGES[range_]
+    if lookback is None:
+        return {**get_intraday(ticker), "range": range_, "resolution": resolution}
+    now = int(time.time())
+    if range_ == "5D":
+        days = calendar.trading_days(last_trading_day() - timedelta(days=14), last_trading_day())
+        from_ts = session_bounds(days[-lookback])[0]
+    else:
+        from_ts = now - lookback * 86400
+    bars, is_stale = get_candles(ticker, resolution, from_ts, now)
+    return {
+        "bars": bars_to_json(bars),
+        "range": range_,
+        "resolution": resolution,
+        "market": market_state(),
+        "source": "finnhub" if len(bars["t"]) else "none",
+        "stale": is_stale,
+    }
 
 
 # ────── Movers ───────────────────────────────────────────────────────
@@ -243,12 +797,14 @@ def list_movers(limit: int = 8) -> dict:
     Server-cached; never per-user.
     """
     state = market_state()
-    fresh, stale = (30, 120) if state["state"] == "open" else (300, 1800)
+    fresh, stale = _aligned(30, 120) if state["state"] == "open" else _aligned(300, 1800)
 
     def _fetch():
         rows = []
-        for sym in MOVER_UNIVERSE:
-            q = get_quote(sym)
+        # Movers are a shared view, never worth a user's quote budget.
+        with budget.priority(budget.BACKGROUND):
+            quotes = get_quotes(MOVER_UNIVERSE)
+        for sym, q in quotes.items():
             if not q or q.get("price") is None or q.get("previous_close") in (None, 0):
                 continue
             rows.append({
@@ -0,0 +1,307 @@
+"""
+Nightly end-of-day portfolio valuation snapshots.
+
+  portfolio_snapshots(user_id, date, value, cost, pnl)   PRIMARY KEY (user_id, date)
+
+One row per user per trading day, so `/portfolio/history` is a single
+indexed range scan for any span instead of a re-valuation per view.
+
+The job is incremental: each user resumes from the day after their
+latest snapshot (or their first purchase). Users are processed in
+batches; each batch reads closes for the union of its tickers from the
+EOD store once, so users holding the same names share that work, and
+every user's gap is valued with one vectorized as-of join.
+
+Snapshots record what was held at the time and are never rebuilt from
+`holdings` — sold lots are gone from that table, so a rebuild would
+erase positions the user really had. A sell leaves them alone. A
+backdated buy is folded in arithmetically: its value and cost are added
+to every snapshotted day from its purchase date, in the same transaction
+as the lot insert. Days before the user's first snapshot are filled in
+from the new lots alone — anything sold before then left no trace — and
+the caller is told that stretch of history is partial.
+
+Work is serialized per user, not globally. Reads never value anything:
+a user whose snapshots are behind the last settled close is caught up
+on a background worker and the read reports itself as pending.
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import date, timedelta
+
+from ..ai.market import calendar
+from ..ai.sources import budget
+from ..config import get_db_path
+from .eod_store import eod_store, last_closed_day
+from .valuation import valuation_series
+
+log = logging.getLogger("tickr.history")
+
+_BATCH_USERS = 200
+_MAX_LOOKBACK_DAYS = 10 * 366
+_JOB_CHECK_S = 30 * 60
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+        user_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        value REAL NOT NULL,
+        cost REAL NOT NULL,
+        pnl REAL NOT NULL,
+        PRIMARY KEY (user_id, date)
+    ) WITHOUT ROWID
+    """,
+)
+
+
+def ensure_schema(cursor) -> None:
+    for stmt in _SCHEMA:
+        cursor.execute(stmt)
+
+
+def backdate(cursor, user_id: str, lots: list[tuple], closes: dict) -> bool:
+    """
+    Fold newly inserted `(ticker, quantity, price, purchase_date)` lots
+    into the user's existing snapshots. `closes` comes from
+    `PortfolioHistory.backdate_closes`, fetched before the transaction
+    opened. Run after the lots are inserted; caller commits (and should
+    hold `user_lock`).
+
+    Returns True when days before the first snapshot were filled in:
+    those hold only `lots`, since lots sold before then are gone.
+    """
+    if not closes:
+        return False
+    cursor.execute("SELECT MIN(date) FROM portfolio_snapshots WHERE user_id = ?", (user_id,))
+    first = cursor.fetchone()[0]
+    if first is None:
+        return False   # nothing snapshotted yet — the next update builds from holdings
+    first = date.fromisoformat(first)
+    start = date.fromisoformat(min(lot[3] for lot in lots))
+    axis = calendar.trading_days(start, last_closed_day())
+    if not axis:
+        return False
+
+    # The new lots' contribution is additive on snapshotted days and is
+    # all that's known about the days before them.
+    values, costs = valuation_series(axis, lots, closes)
+    rows = [(d.isoformat(), float(v), float(c)) for d, v, c in zip(axis, values, costs)]
+    cut = first.isoformat()
+    cursor.executemany(
+        "UPDATE portfolio_snapshots SET value = value + ?, cost = cost + ?, pnl = pnl + ? "
+        "WHERE user_id = ? AND date = ?",
+        [(v, c, v - c, user_id, d) for d, v, c in rows if d >= cut],
+    )
+    gap = [(user_id, d, v, c, v - c) for d, v, c in rows if d < cut]
+    cursor.executemany(
+        "INSERT OR IGNORE INTO portfolio_snapshots (user_id, date, value, cost, pnl) VALUES (?, ?, ?, ?, ?)",
+        gap,
+    )
+    return bool(gap)
+
+
+class PortfolioHistory:
+    def __init__(self, db_path: str | None = None):
+        self._db_path = db_path
+        self._schema_ready = False
+        self._meta_lock = threading.Lock()
+        self._user_locks: dict[str, threading.Lock] = {}
+        self._catchup_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-catchup")
+        self._catchup_queued: set[str] = set()
+        self._job_started = False
+        self._last_job_day: date | None = None
+        self._stats = {"job_runs": 0, "rows_written": 0, "users_valued": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path or get_db_path(), timeout=10.0)
+        if not self._schema_ready:
+            ensure_schema(conn.cursor())
+            conn.commit()
+            self._schema_ready = True
+        return conn
+
+    # ── Snapshot computation ──
+
+    def _pending(self, conn, user_ids: list[str]) -> dict[str, date]:
+        """user → first day still missing a snapshot."""
+        where = f"WHERE user_id IN ({','.join('?' * len(user_ids))})"
+        args = tuple(user_ids)
+        firsts = conn.execute(
+            f"SELECT user_id, MIN(COALESCE(purchase_date, '1970-01-01')) FROM holdings {where} GROUP BY user_id",
+            args,
+        ).fetchall()
+        lasts = dict(conn.execute(
+            f"SELECT user_id, MAX(date) FROM portfolio_snapshots {where} GROUP BY user_id",
+            args,
+        ).fetchall())
+        out = {}
+        for user_id, first in firsts:
+            last = lasts.get(user_id)
+            out[user_id] = (
+                date.fromisoformat(last) + timedelta(days=1) if last else date.fromisoformat(first)
+            )
+        return out
+
+    @contextmanager
+    def user_lock(self, user_id: str):
+        """Serializes snapshot writes for one user (updates, backdated buys)."""
+        with self._meta_lock:
+            lock = self._user_locks.setdefault(user_id, threading.Lock())
+        with lock:
+            yield
+
+    def update(self, user_ids: list[str] | None = None, through: date | None = None) -> int:
+        """Snapshot every missing trading day up to `through`. Returns rows written."""
+        through = through or last_closed_day()
+        conn = self._connect()
+        written = 0
+        try:
+            if user_ids is None:
+                user_ids = [r[0] for r in conn.execute("SELECT DISTINCT user_id FROM holdings")]
+            users = sorted(set(user_ids))
+            for i in range(0, len(users), _BATCH_USERS):
+                batch = users[i:i + _BATCH_USERS]
+                # Locks taken in sorted order, so batches never deadlock.
+                with ExitStack() as stack:
+                    for user_id in batch:
+                        stack.enter_context(self.user_lock(user_id))
+                    floor = through - timedelta(days=_MAX_LOOKBACK_DAYS)
+                    pending = {
+                        u: max(start, floor)
+                        for u, start in self._pending(conn, batch).items()
+                        if start <= through
+                    }
+                    if pending:
+                        written += self._update_batch(conn, pending, through)
+        finally:
+            conn.close()
+        self._stats["rows_written"] += written
+        return written
+
+    def _update_batch(self, conn, starts: dict[str, date], through: date) -> int:
+        marks = ",".join("?" * len(starts))
+        lots_by_user: dict[str, list[tuple]] = defaultdict(list)
+        for user_id, ticker, qty, price, bought in conn.execute(
+            f"SELECT user_id, ticker, quantity, avg_price, COALESCE(purchase_date, '1970-01-01') "
+            f"FROM holdings WHERE user_id IN ({marks})",
+            tuple(starts),
+        ):
+            lots_by_user[user_id].append((ticker, qty, price, bought))
+
+        # One EOD read for the batch's ticker union, with a week of lead-in
+        # so the first day of each gap has a prior close to carry forward.
+        tickers = sorted({lot[0] for lots in lots_by_user.values() for lot in lots})
+        earliest = min(starts.values())
+        closes = eod_store.closes(tickers, earliest - timedelta(days=7), through)
+        axis_all = calendar.trading_days(earliest, through)
+
+        rows = []
+        for user_id, start in starts.items():
+            lots = lots_by_user.get(user_id)
+            axis = [d for d in axis_all if d >= start]
+            if not lots or not axis:
+                continue
+            values, costs = valuation_series(axis, lots, closes)
+            rows.extend(
+                (user_id, d.isoformat(), float(v), float(c), float(v - c))
+                for d, v, c in zip(axis, values, costs)
+            )
+            self._stats["users_valued"] += 1
+        conn.executemany(
+            "INSERT OR REPLACE INTO portfolio_snapshots (user_id, date, value, cost, pnl) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        return len(rows)
+
+    # ── Reads ──
+
+    def series(self, user_id: str, start: date, end: date) -> tuple[list[tuple[str, float, float, float]], bool]:
+        """
+        ([(date, value, cost, pnl)] for [start, end], pending). Snapshots
+        only; `pending` means the user is behind the last settled close
+        and a catch-up has been queued.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT date, value, cost, pnl FROM portfolio_snapshots "
+                "WHERE user_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (user_id, start.isoformat(), end.isoformat()),
+            ).fetchall()
+            behind = self._pending(conn, [user_id]).get(user_id)
+        finally:
+            conn.close()
+        pending = behind is not None and behind <= last_closed_day()
+        if pending:
+            self._catch_up(user_id)
+        return rows, pending
+
+    def _catch_up(self, user_id: str) -> None:
+        with self._meta_lock:
+            if user_id in self._catchup_queued:
+                return
+            self._catchup_queued.add(user_id)
+        self._catchup_pool.submit(self._run_catch_up, user_id)
+
+    def _run_catch_up(self, user_id: str) -> None:
+        try:
+            with budget.priority(budget.BACKGROUND):
+                self.update([user_id])
+        except Exception:  # noqa: BLE001 — the next read queues it again
+            log.exception("Snapshot catch-up failed for %s", user_id)
+        finally:
+            with self._meta_lock:
+                self._catchup_queued.discard(user_id)
+
+    def backdate_closes(self, user_id: str, lots: list[tuple]) -> dict | None:
+        """
+        Closes `backdate` will need for `lots` — None when no lot predates
+        the last settled close. Call BEFORE opening the write transaction:
+        it may backfill the EOD store.
+        """
+        through = last_closed_day()
+        start = min(date.fromisoformat(lot[3]) for lot in lots)
+        if start > through:
+            return None
+        tickers = sorted({lot[0] for lot in lots})
+        return eod_store.closes(tickers, start - timedelta(days=7), through)
+
+    # ── Nightly job ──
+
+    def start(self) -> None:
+        """Idempotent. Snapshots every user once per trading day, after the close."""
+        with self._meta_lock:
+            if self._job_started:
+                return
+            self._job_started = True
+        threading.Thread(target=self._run, name="portfolio-snapshots", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                day = last_closed_day()
+                if day != self._last_job_day:
+                    # Make sure the EOD store has the close before valuing it.
+                    eod_store.run_once(day)
+                    n = self.update(through=day)
+                    self._last_job_day = day
+                    self._stats["job_runs"] += 1
+                    log.info("Portfolio snapshots through %s: %d rows", day, n)
+            except Exception:  # noqa: BLE001 — keep the job alive
+                log.exception("Portfolio snapshot job failed")
+            time.sleep(_JOB_CHECK_S)
+
+    def stats(self) -> dict:
+        return {**self._stats, "last_job_day": self._last_job_day and self._last_job_day.isoformat()}
+
+
+portfolio_history = PortfolioHistory()
@@ -0,0 +1,139 @@
+"""
+Materialized per-(user, ticker) positions.
+
+`holdings` keeps one row per purchase lot (the history chart and FIFO
+sells need them). `positions` is the aggregate — total quantity, cost
+basis, first/last purchase date — maintained in the same transaction as
+every lot insert and sell, so reads never re-aggregate lots.
+
+Sells are set-based: one windowed query finds the lot where the running
+FIFO total reaches the sell quantity; everything before it is deleted in
+one statement and that boundary lot is trimmed (or deleted) in another,
+however many lots the sell spans.
+
+All helpers take a cursor and never commit — the caller owns the
+transaction.
+"""
+from __future__ import annotations
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS positions (
+        user_id TEXT NOT NULL,
+        ticker TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        cost_basis REAL NOT NULL,
+        first_purchase TEXT,
+        last_purchase TEXT,
+        company_name TEXT,
+        PRIMARY KEY (user_id, ticker)
+    ) WITHOUT ROWID
+    """,
+    # FIFO order within a (user, ticker) — serves sells, lot listings and
+    # per-user scans. Keyed on the same expression the FIFO queries sort by.
+    "CREATE INDEX IF NOT EXISTS idx_holdings_user_ticker_fifo "
+    "ON holdings (user_id, ticker, COALESCE(purchase_date, ''), id)",
+)
+
+# Lots in FIFO order; NULL dates (pre-date-tracking rows) sell first.
+_FIFO_KEY = "COALESCE(purchase_date, '')"
+
+
+def ensure_schema(cursor) -> None:
+    for stmt in SCHEMA:
+        cursor.execute(stmt)
+
+
+def rebuild_all(cursor) -> None:
+    """Recompute every position from lots (migrations / repair)."""
+    cursor.execute("DELETE FROM positions")
+    cursor.execute(
+        """
+        INSERT INTO positions (user_id, ticker, quantity, cost_basis, first_purchase, last_purchase, company_name)
+        SELECT user_id, ticker, SUM(quantity), SUM(quantity * avg_price),
+               MIN(purchase_date), MAX(purchase_date), MAX(company_name)
+        FROM holdings
+        GROUP BY user_id, ticker
+        """
+    )
+
+
+def record_buys(cursor, user_id: str, lots: list[tuple]) -> None:
+    """
+    Insert `(ticker, quantity, price, company_name, purchase_date)` lots
+    and fold them into their positions.
+    """
+    cursor.executemany(
+        "INSERT INTO holdings (user_id, ticker, quantity, avg_price, company_name, purchase_date) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [(user_id, *lot) for lot in lots],
+    )
+    cursor.executemany(
+        """
+        INSERT INTO positions (user_id, ticker, quantity, cost_basis, first_purchase, last_purchase, company_name)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, ticker) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            cost_basis = cost_basis + excluded.cost_basis,
+            first_purchase = MIN(COALESCE(first_purchase, excluded.first_purchase),
+                                 COALESCE(excluded.first_purchase, first_purchase)),
+            last_purchase = MAX(COALESCE(last_purchase, excluded.last_purchase),
+                                COALESCE(excluded.last_purchase, last_purchase)),
+            company_name = COALESCE(excluded.company_name, company_name)
+        """,
+        [(user_id, t, q, q * p, d, d, name) for t, q, p, name, d in lots],
+    )
+
+
+def refresh_position(cursor, user_id: str, ticker: str) -> None:
+    """Re-derive one position from its remaining lots (after a sell)."""
+    cursor.execute("DELETE FROM positions WHERE user_id = ? AND ticker = ?", (user_id, ticker))
+    cursor.execute(
+        """
+        INSERT INTO positions (user_id, ticker, quantity, cost_basis, first_purchase, last_purchase, company_name)
+        SELECT user_id, ticker, SUM(quantity), SUM(quantity * avg_price),
+               MIN(purchase_date), MAX(purchase_date), MAX(company_name)
+        FROM holdings
+        WHERE user_id = ? AND ticker = ?
+        GROUP BY user_id, ticker
+        """,
+        (user_id, ticker),
+    )
+
+
+def held_quantity(cursor, user_id: str, ticker: str) -> int | None:
+    cursor.execute("SELECT quantity FROM positions WHERE user_id = ? AND ticker = ?", (user_id, ticker))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def sell_fifo(cursor, user_id: str, ticker: str, quantity: int) -> None:
+    """Remove `quantity` shares oldest-lot-first. Caller checks the holding suffices."""
+    cursor.execute(
+        f"""
+        SELECT id, {_FIFO_KEY}, running FROM (
+            SELECT id, purchase_date,
+                   SUM(quantity) OVER (ORDER BY {_FIFO_KEY}, id ROWS UNBOUNDED PRECEDING) AS running
+            FROM holdings
+            WHERE user_id = ? AND ticker = ?
+        )
+        WHERE running >= ?
+        ORDER BY running, 2, id
+        LIMIT 1
+        """,
+        (user_id, ticker, quantity),
+    )
+    boundary = cursor.fetchone()
+    if boundary is None:
+        return
+    lot_id, lot_key, running = boundary
+    # Every lot strictly before the boundary is sold in full.
+    cursor.execute(
+        f"DELETE FROM holdings WHERE user_id = ? AND ticker = ? AND ({_FIFO_KEY}, id) < (?, ?)",
+        (user_id, ticker, lot_key, lot_id),
+    )
+    if running == quantity:
+        cursor.execute("DELETE FROM holdings WHERE id = ?", (lot_id,))
+    else:
+        cursor.execute("UPDATE holdings SET quantity = ? WHERE id = ?", (running - quantity, lot_id))
+    refresh_position(cursor, user_id, ticker)
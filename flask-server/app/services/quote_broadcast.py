@@ -0,0 +1,170 @@
+"""
+Server-side quote fan-out for Server-Sent Events.
+
+All SSE subscribers share one broadcaster thread. It resolves the union
+of subscribed tickers through `market_data.get_quotes` (cache first,
+misses fanned out), diffs each quote against the last value it pushed,
+and enqueues only the changed ones to the subscribers that asked for
+them. Trades from the live quote stream wake it early, so pushes follow
+the tape instead of the poll interval.
+
+Comparison happens once per ticker, not once per subscriber, so 1,000
+clients watching AAPL cost the same upstream work as one.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Optional
+
+from ..ai.sources import budget
+from . import market_data
+from .quote_stream import quote_stream
+
+log = logging.getLogger("tickr.broadcast")
+
+_POLL_S = 5.0            # resolve the union at least this often
+_MIN_FLUSH_S = 1.0       # trade-driven wake-ups are coalesced to this rate
+_QUEUE_MAX = 256         # a subscriber this far behind is dropped
+
+# Fields a client renders; a change in any of them is worth a push.
+_FIELDS = ("price", "change", "change_percent", "high", "low", "stale")
+
+
+def compact_quote(q: dict) -> dict:
+    return {"ticker": q["ticker"], **{k: q.get(k) for k in _FIELDS}, "as_of": q.get("as_of")}
+
+
+class Subscriber:
+    _ids = itertools.count(1)
+
+    def __init__(self, tickers: list[str]):
+        self.id = next(self._ids)
+        self.tickers = set(tickers)
+        self.queue: queue.Queue = queue.Queue(maxsize=_QUEUE_MAX)
+        self.closed = False
+
+    def offer(self, event) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+
+class QuoteBroadcaster:
+    def __init__(self):
+        self._subs: dict[int, Subscriber] = {}
+        self._last: dict[str, tuple] = {}      # ticker → last pushed field tuple
+        self._latest: dict[str, dict] = {}     # ticker → last pushed compact quote
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pushes = 0
+        self._dropped = 0
+
+    # ── Subscription lifecycle ──
+
+    def subscribe(self, tickers: list[str]) -> Subscriber:
+        sub = Subscriber(tickers)
+        with self._lock:
+            self._subs[sub.id] = sub
+            snapshot = [self._latest[t] for t in sub.tickers if t in self._latest]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="quote-broadcast", daemon=True)
+                self._thread.start()
+                quote_stream.add_listener(self._on_trade)
+        for q in snapshot:
+            sub.offer(q)
+        self._wake.set()   # resolve any tickers we haven't pushed yet
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        sub.closed = True
+        with self._lock:
+            self._subs.pop(sub.id, None)
+
+    # ── Fan-out loop ──
+
+    def _on_trade(self, ticker: str, row: dict) -> None:
+        self._wake.set()
+
+    def _union(self) -> tuple[set[str], list[Subscriber]]:
+        with self._lock:
+            subs = list(self._subs.values())
+        union: set[str] = set()
+        for s in subs:
+            union |= s.tickers
+        return union, subs
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(_POLL_S)
+            self._wake.clear()
+            started = time.monotonic()
+            try:
+                # Shared polling must never outrank a user's own request.
+                with budget.priority(budget.BACKGROUND):
+                    self._flush()
+            except Exception:  # noqa: BLE001 — keep the fan-out alive
+                log.exception("Quote broadcast flush failed")
+            # Coalesce bursts of trades into at most one flush per interval.
+            time.sleep(max(0.0, _MIN_FLUSH_S - (time.monotonic() - started)))
+
+    def _flush(self) -> None:
+        union, subs = self._union()
+        if not union:
+            with self._lock:
+                self._last.clear()
+                self._latest.clear()
+            return
+
+        changed: dict[str, dict] = {}
+        for ticker, q in market_data.get_quotes(sorted(union), deadline=_POLL_S, watch=True).items():
+            if not q:
+                continue
+            fingerprint = tuple(q.get(k) for k in _FIELDS)
+            if self._last.get(ticker) == fingerprint:
+                continue
+            self._last[ticker] = fingerprint
+            changed[ticker] = self._latest[ticker] = compact_quote(q)
+
+        # Forget tickers nobody watches any more.
+        for stale in set(self._last) - union:
+            self._last.pop(stale, None)
+            self._latest.pop(stale, None)
+
+        if not changed:
+            return
+        for sub in subs:
+            for ticker in sub.tickers & changed.keys():
+                if not sub.offer(changed[ticker]):
+                    self._evict(sub)
+                    break
+                self._pushes += 1
+
+    def _evict(self, sub: Subscriber) -> None:
+        """Too slow to keep up — cut it loose; EventSource reconnects."""
+        self._dropped += 1
+        self.unsubscribe(sub)
+        while True:
+            try:
+                sub.queue.get_nowait()
+            except queue.Empty:
+                break
+        sub.offer(None)
+
+    def stats(self) -> dict:
+        union, subs = self._union()
+        return {
+            "subscribers": len(subs),
+            "tickers": len(union),
+            "pushes": self._pushes,
+            "dropped": self._dropped,
+        }
+
+
+broadcaster = QuoteBroadcaster()
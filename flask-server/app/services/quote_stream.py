@@ -0,0 +1,373 @@
+"""
+Push-based live quote ingestion.
+
+Instead of polling /quote per ticker, one upstream streaming connection
+(Finnhub's trade websocket) is kept subscribed to the union of tickers
+somebody has asked for recently. Trades update an in-memory quote table,
+so during market hours `market_data.get_quote` answers from memory and
+never blocks on the network.
+
+  watch(ticker) ──► lease (10 min) ──► feed.subscribe
+                     (holdings and SSE subscribers only — see market_data)
+  feed trades   ──► QuoteTable.apply ──► listeners (SSE fan-out)
+  REST quote    ──► QuoteTable.seed   (open / prev close / day range)
+
+The table only holds what trades can't tell us from the REST snapshot
+it was seeded with; a row seeded on a previous trading day is ignored
+until it is re-seeded. A row no trade has touched yet is only served
+for `_SEED_TTL_S` after its seed — the same freshness a REST quote gets
+during the session — after which get_quote re-seeds it from REST.
+
+Feeds:
+  finnhub    — wss://ws.finnhub.io (needs `websocket-client`)
+  synthetic  — in-process random walk, for offline dev and tests
+  off        — disabled; get_quote falls back to the SWR REST path
+
+Selected by QUOTE_STREAM; defaults to `finnhub` when an API key is set.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+from ..ai.market import last_trading_day
+
+log = logging.getLogger("tickr.stream")
+
+_LEASE_S = 600           # a ticker stays subscribed this long after its last read
+_MAX_SYMBOLS = 50        # Finnhub free-tier websocket symbol cap
+_SWEEP_S = 30
+_SEED_TTL_S = 15         # matches market_data's open-session quote TTL
+_SYMBOL = re.compile(r"^[A-Z0-9][A-Z0-9.\-]{0,9}$")
+
+
+# ────── Quote table ──────────────────────────────────────────────────
+
+class QuoteTable:
+    """Latest Finnhub-shaped quote per ticker, updated from trades."""
+
+    def __init__(self):
+        self._rows: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def seed(self, ticker: str, raw: dict) -> None:
+        """Adopt a REST snapshot without rolling back newer trade prices."""
+        day = last_trading_day().isoformat()
+        with self._lock:
+            row = self._rows.get(ticker)
+            if row is None or row["day"] != day or (raw.get("t") or 0) >= row["t"]:
+                self._rows[ticker] = {
+                    "c": raw.get("c"), "o": raw.get("o"), "h": raw.get("h"),
+                    "l": raw.get("l"), "pc": raw.get("pc"),
+                    "t": raw.get("t") or int(time.time()), "day": day,
+                    "seeded_at": time.time(), "traded": False,
+                }
+            else:
+                row.update(o=raw.get("o"), pc=raw.get("pc"))
+
+    def apply(self, ticker: str, price: float, ts: int) -> Optional[dict]:
+        """Fold one trade in. Returns the updated row, or None if unseeded."""
+        with self._lock:
+            row = self._rows.get(ticker)
+            if row is None or ts < row["t"]:
+                return None
+            row["c"] = price
+            row["h"] = max(row["h"] or price, price)
+            row["l"] = min(row["l"] or price, price)
+            row["t"] = ts
+            row["traded"] = True
+            return dict(row)
+
+    def get(self, ticker: str, any_age: bool = False) -> Optional[dict]:
+        """Today's row; an untraded seed past its TTL counts as missing unless `any_age`."""
+        day = last_trading_day().isoformat()
+        with self._lock:
+            row = self._rows.get(ticker)
+            if row is None or row["day"] != day:
+                return None
+            if not any_age and not row["traded"] and time.time() - row["seeded_at"] > _SEED_TTL_S:
+                return None   # REST snapshot only, and it's aged out
+            return dict(row)
+
+    def drop(self, ticker: str) -> None:
+        with self._lock:
+            self._rows.pop(ticker, None)
+
+
+# ────── Feeds ────────────────────────────────────────────────────────
+
+TradeCallback = Callable[[str, float, int], None]
+
+
+class TradeFeed:
+    name = "base"
+
+    def start(self, on_trade: TradeCallback) -> None: ...
+    def subscribe(self, ticker: str) -> None: ...
+    def unsubscribe(self, ticker: str) -> None: ...
+    def stop(self) -> None: ...
+
+    @property
+    def connected(self) -> bool:
+        return False
+
+
+class FinnhubTradeFeed(TradeFeed):
+    """Finnhub trade websocket with reconnect + resubscribe."""
+
+    name = "finnhub"
+
+    def __init__(self, api_key: str, url: Optional[str] = None):
+        try:
+            import websocket  # websocket-client
+        except ImportError as exc:
+            raise RuntimeError("Quote streaming needs `websocket-client` installed.") from exc
+        self._ws_mod = websocket
+        self._url = url or os.environ.get("FINNHUB_WS_URL") or "wss://ws.finnhub.io"
+        self._api_key = api_key
+        self._symbols: set[str] = set()
+        self._lock = threading.Lock()
+        self._app = None
+        self._connected = False
+        self._stopped = threading.Event()
+        self._on_trade: Optional[TradeCallback] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    def start(self, on_trade: TradeCallback) -> None:
+        self._on_trade = on_trade
+        threading.Thread(target=self._run, name="quote-stream", daemon=True).start()
+
+    def _send(self, kind: str, ticker: str) -> None:
+        app = self._app
+        if app is None or not self._connected:
+            return  # resubscribed on (re)connect
+        try:
+            app.send(json.dumps({"type": kind, "symbol": ticker}))
+        except Exception as exc:  # noqa: BLE001
+            log.warning("Stream %s %s failed: %s", kind, ticker, exc)
+
+    def subscribe(self, ticker: str) -> None:
+        with self._lock:
+            self._symbols.add(ticker)
+        self._send("subscribe", ticker)
+
+    def unsubscribe(self, ticker: str) -> None:
+        with self._lock:
+            self._symbols.discard(ticker)
+        self._send("unsubscribe", ticker)
+
+    def _on_open(self, app):
+        self._connected = True
+        with self._lock:
+            symbols = list(self._symbols)
+        for sym in symbols:
+            app.send(json.dumps({"type": "subscribe", "symbol": sym}))
+        log.info("Quote stream connected (%d symbols)", len(symbols))
+
+    def _on_message(self, app, message):
+        try:
+            msg = json.loads(message)
+        except ValueError:
+            return
+        if msg.get("type") != "trade":
+            return
+        for trade in msg.get("data") or []:
+            sym, price, ts = trade.get("s"), trade.get("p"), trade.get("t")
+            if sym and price is not None and ts:
+                self._on_trade(sym, float(price), int(ts) // 1000)
+
+    def _on_close(self, app, *args):
+        self._connected = False
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stopped.is_set():
+            self._app = self._ws_mod.WebSocketApp(
+                f"{self._url}?token={self._api_key}",
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=lambda app, err: log.warning("Quote stream error: %s", err),
+            )
+            started = time.monotonic()
+            self._app.run_forever(ping_interval=30, ping_timeout=10)
+            self._connected = False
+            if self._stopped.is_set():
+                break
+            # Reset backoff after a connection that stayed up a while.
+            backoff = 1.0 if time.monotonic() - started > 60 else min(60.0, backoff * 2)
+            self._stopped.wait(backoff)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._app is not None:
+            self._app.close()
+
+
+class SyntheticTradeFeed(TradeFeed):
+    """Random-walk trades around the seeded price. Offline stand-in."""
+
+    name = "synthetic"
+
+    def __init__(self, table: QuoteTable, interval: float = 1.0):
+        self._table = table
+        self._interval = interval
+        self._symbols: set[str] = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @property
+    def connected(self) -> bool:
+        return not self._stopped.is_set()
+
+    def start(self, on_trade: TradeCallback) -> None:
+        def _run():
+            rng = random.Random()
+            while not self._stopped.wait(self._interval):
+                with self._lock:
+                    symbols = list(self._symbols)
+                now = int(time.time())
+                for sym in symbols:
+                    row = self._table.get(sym, any_age=True)
+                    if row and row.get("c"):
+                        on_trade(sym, round(row["c"] * (1 + rng.gauss(0, 0.0008)), 4), now)
+
+        threading.Thread(target=_run, name="quote-stream-synthetic", daemon=True).start()
+
+    def subscribe(self, ticker: str) -> None:
+        with self._lock:
+            self._symbols.add(ticker)
+
+    def unsubscribe(self, ticker: str) -> None:
+        with self._lock:
+            self._symbols.discard(ticker)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+# ────── Service ──────────────────────────────────────────────────────
+
+class QuoteStreamService:
+    def __init__(self):
+        self.table = QuoteTable()
+        self._feed: Optional[TradeFeed] = None
+        self._leases: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[[str, dict], None]] = []
+        self._started = False
+        self._trades = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._feed is not None
+
+    def start(self, mode: Optional[str] = None) -> None:
+        """Idempotent. Resolves the feed from QUOTE_STREAM and starts it."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        api_key = os.environ.get("FINNHUB_API_KEY") or ""
+        mode = (mode or os.environ.get("QUOTE_STREAM") or ("finnhub" if api_key else "off")).lower()
+        try:
+            if mode == "finnhub":
+                self._feed = FinnhubTradeFeed(api_key)
+            elif mode == "synthetic":
+                self._feed = SyntheticTradeFeed(self.table)
+            else:
+                return
+        except RuntimeError as exc:
+            log.warning("Quote stream disabled: %s", exc)
+            return
+        self._feed.start(self._on_trade)
+        threading.Thread(target=self._sweep, name="quote-stream-sweep", daemon=True).start()
+        log.info("Quote stream started (%s)", self._feed.name)
+
+    def watch(self, ticker: str) -> None:
+        """Renew `ticker`'s lease, subscribing upstream if it is new."""
+        if self._feed is None or not _SYMBOL.match(ticker):
+            return
+        now = time.time()
+        evicted = None
+        with self._lock:
+            is_new = ticker not in self._leases
+            self._leases[ticker] = now + _LEASE_S
+            if is_new and len(self._leases) > _MAX_SYMBOLS:
+                evicted = min(self._leases, key=self._leases.get)
+                self._leases.pop(evicted)
+        if evicted:
+            self._feed.unsubscribe(evicted)
+            self.table.drop(evicted)
+        if is_new:
+            self._feed.subscribe(ticker)
+
+    def quote(self, ticker: str) -> Optional[dict]:
+        """
+        Live Finnhub-shaped quote from the table, or None when the stream
+        is off, disconnected, or the ticker hasn't been seeded today.
+        """
+        if self._feed is None or not self._feed.connected:
+            return None
+        return self.table.get(ticker)
+
+    def seed(self, ticker: str, raw: Optional[dict]) -> None:
+        # Only leased tickers get rows; the sweep never drops anything else.
+        if self._feed is not None and raw and ticker in self._leases:
+            self.table.seed(ticker, raw)
+
+    def add_listener(self, fn: Callable[[str, dict], None]) -> None:
+        with self._lock:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[[str, dict], None]) -> None:
+        with self._lock:
+            if fn in self._listeners:
+                self._listeners.remove(fn)
+
+    def _on_trade(self, ticker: str, price: float, ts: int) -> None:
+        row = self.table.apply(ticker, price, ts)
+        if row is None:
+            return
+        self._trades += 1
+        with self._lock:
+            listeners = list(self._listeners)
+        for fn in listeners:
+            try:
+                fn(ticker, row)
+            except Exception:  # noqa: BLE001 — one bad listener can't stall ingestion
+                log.exception("Quote listener failed")
+
+    def _sweep(self) -> None:
+        while True:
+            time.sleep(_SWEEP_S)
+            now = time.time()
+            with self._lock:
+                expired = [t for t, until in self._leases.items() if until < now]
+                for t in expired:
+                    self._leases.pop(t, None)
+            for t in expired:
+                self._feed.unsubscribe(t)
+                self.table.drop(t)
+
+    def stats(self) -> dict:
+        with self._lock:
+            watched = len(self._leases)
+        return {
+            "feed": self._feed.name if self._feed else "off",
+            "connected": bool(self._feed and self._feed.connected),
+            "watched": watched,
+            "trades": self._trades,
+        }
+
+
+quote_stream = QuoteStreamService()
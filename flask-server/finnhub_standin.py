@@ -0,0 +1,247 @@
+"""
+Local Finnhub stand-in for offline development and load testing.
+
+Mimics the endpoints FinnhubSource uses:
+
+  /api/v1/company-news   /api/v1/quote   /api/v1/stock/candle
+  /api/v1/stock/profile2 /api/v1/search
+
+Responses come from recorded fixtures when present (the layout written
+by FINNHUB_RECORD_DIR — see app/ai/sources/http.py) and from
+deterministic synthetic data otherwise. Prices are a pure function of
+(symbol, timestamp), so overlapping candle requests always agree.
+
+Latency, error rate and 429 injection are configurable so breaker,
+budget and cache behaviour can be measured without hitting finnhub.io.
+
+    python flask-server/finnhub_standin.py --port 8765 --latency-ms 80 \\
+        --error-rate 0.05 --throttle-rate 0.02 --fixtures ./fixtures
+    FINNHUB_BASE_URL=http://127.0.0.1:8765/api/v1 FINNHUB_API_KEY=dev python run.py
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ai.sources.http import fixture_path  # noqa: E402
+
+NY = ZoneInfo("America/New_York")
+_PREFIX = "/api/v1/"
+_RESOLUTION_S = {"1": 60, "5": 300, "15": 900, "30": 1800, "60": 3600,
+                 "D": 86400, "W": 7 * 86400, "M": 30 * 86400}
+
+
+# ────── Synthetic market ─────────────────────────────────────────────
+
+def _seed(symbol: str) -> int:
+    return int(hashlib.sha1(symbol.encode()).hexdigest()[:8], 16)
+
+
+def _price(symbol: str, ts: int) -> float:
+    """Smooth, deterministic price path: weekly swing + intraday wiggle."""
+    s = _seed(symbol)
+    base = 20 + s % 480
+    phase = (s % 1000) / 159.0
+    drift = 1 + 0.08 * math.sin(ts / (7 * 86400) + phase)
+    wiggle = 1 + 0.006 * math.sin(ts / 1800 + phase * 3)
+    return round(base * drift * wiggle, 2)
+
+
+def _in_session(ts: int) -> bool:
+    ny = datetime.fromtimestamp(ts, tz=timezone.utc).astimezone(NY)
+    minutes = ny.hour * 60 + ny.minute
+    return ny.weekday() < 5 and 4 * 60 <= minutes < 20 * 60
+
+
+def _synthetic_candles(symbol: str, resolution: str, from_ts: int, to_ts: int) -> dict:
+    step = _RESOLUTION_S.get(resolution)
+    if not step:
+        return {"s": "no_data"}
+    intraday = step < 86400
+    t_out, o, h, l, c, v = [], [], [], [], [], []
+    ts = from_ts - from_ts % step
+    while ts <= to_ts:
+        keep = _in_session(ts) if intraday else datetime.fromtimestamp(ts, tz=timezone.utc).weekday() < 5
+        if ts >= from_ts and keep:
+            op, cl = _price(symbol, ts), _price(symbol, ts + step - 1)
+            t_out.append(ts)
+            o.append(op)
+            c.append(cl)
+            h.append(round(max(op, cl) * 1.002, 2))
+            l.append(round(min(op, cl) * 0.998, 2))
+            v.append(1000 + (_seed(symbol) + ts // step) % 50000)
+        ts += step
+    if not t_out:
+        return {"s": "no_data"}
+    return {"s": "ok", "t": t_out, "o": o, "h": h, "l": l, "c": c, "v": v}
+
+
+def _synthetic_quote(symbol: str) -> dict:
+    now = int(time.time())
+    day_start = int(datetime.now(NY).replace(hour=9, minute=30, second=0, microsecond=0).timestamp())
+    prev = _price(symbol, day_start - 86400)
+    cur = _price(symbol, now)
+    opn = _price(symbol, day_start)
+    return {
+        "c": cur, "d": round(cur - prev, 4), "dp": round((cur - prev) / prev * 100, 4),
+        "h": round(max(cur, opn) * 1.004, 2), "l": round(min(cur, opn) * 0.996, 2),
+        "o": opn, "pc": prev, "t": now,
+    }
+
+
+_HEADLINES = [
+    "{sym} shares climb after upbeat guidance",
+    "Analysts raise {sym} price target on strong demand",
+    "{sym} faces regulatory scrutiny over new product line",
+    "{sym} misses revenue estimates as costs rise",
+    "Investors weigh {sym} outlook ahead of earnings",
+    "{sym} announces buyback and dividend increase",
+]
+_SOURCES = ["Reuters", "Bloomberg", "CNBC", "MarketWatch", "Yahoo", "Benzinga"]
+
+
+def _synthetic_news(symbol: str, date_from: str, date_to: str) -> list[dict]:
+    try:
+        start = datetime.strptime(date_from, "%Y-%m-%d")
+        end = datetime.strptime(date_to, "%Y-%m-%d")
+    except ValueError:
+        end = datetime.utcnow()
+        start = end - timedelta(days=7)
+    rng = random.Random(_seed(symbol))
+    out = []
+    day = start
+    while day <= end:
+        for i in range(2):
+            ts = int(day.replace(tzinfo=timezone.utc).timestamp()) + 3600 * (13 + 3 * i)
+            idx = rng.randrange(len(_HEADLINES))
+            out.append({
+                "category": "company",
+                "datetime": ts,
+                "headline": _HEADLINES[idx].format(sym=symbol),
+                "id": ts + idx,
+                "related": symbol,
+                "source": _SOURCES[rng.randrange(len(_SOURCES))],
+                "summary": f"Synthetic stand-in article about {symbol}.",
+                "url": f"https://standin.local/{symbol.lower()}/{ts}-{idx}",
+            })
+        day += timedelta(days=1)
+    out.sort(key=lambda a: -a["datetime"])
+    return out
+
+
+def _synthetic(endpoint: str, q: dict) -> object:
+    sym = (q.get("symbol") or "").upper()
+    if endpoint == "quote":
+        return _synthetic_quote(sym)
+    if endpoint == "stock/candle":
+        return _synthetic_candles(sym, q.get("resolution", "D"),
+                                  int(q.get("from", 0)), int(q.get("to", time.time())))
+    if endpoint == "stock/profile2":
+        return {"name": f"{sym} Holdings Inc", "ticker": sym, "exchange": "NASDAQ", "currency": "USD"}
+    if endpoint == "company-news":
+        return _synthetic_news(sym, q.get("from", ""), q.get("to", ""))
+    if endpoint == "search":
+        term = (q.get("q") or "").upper()
+        return {"count": 1, "result": [{"symbol": term, "displaySymbol": term,
+                                        "description": f"{term} Holdings Inc", "type": "Common Stock"}]}
+    return None
+
+
+# ────── HTTP layer ───────────────────────────────────────────────────
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = "FinnhubStandin/1.0"
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+
+    def log_message(self, fmt, *args):  # noqa: D401 — quieter default logging
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status: int, payload, headers: dict | None = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # noqa: N802
+        cfg = self.server
+        url = urlparse(self.path)
+        if not url.path.startswith(_PREFIX):
+            return self._send(404, {"error": "not found"})
+        endpoint = url.path[len(_PREFIX):].strip("/")
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        delay = cfg.latency_ms + (cfg.rng.uniform(0, cfg.jitter_ms) if cfg.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        roll = cfg.rng.random()
+        if roll < cfg.throttle_rate:
+            return self._send(429, {"error": "API limit reached."}, {"Retry-After": str(cfg.retry_after)})
+        if roll < cfg.throttle_rate + cfg.error_rate:
+            return self._send(503, {"error": "injected failure"})
+
+        payload = None
+        if cfg.fixtures:
+            path = fixture_path(cfg.fixtures, endpoint, q)
+            if os.path.isfile(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+        if payload is None:
+            payload = _synthetic(endpoint, q)
+        if payload is None:
+            return self._send(404, {"error": f"unknown endpoint {endpoint}"})
+        return self._send(200, payload)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--fixtures", default="", help="recorded fixture root (FINNHUB_RECORD_DIR layout)")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered 503")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="share of calls answered 429")
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), StandinHandler)
+    server.daemon_threads = True
+    server.fixtures = args.fixtures
+    server.latency_ms = args.latency_ms
+    server.jitter_ms = args.jitter_ms
+    server.error_rate = args.error_rate
+    server.throttle_rate = args.throttle_rate
+    server.retry_after = args.retry_after
+    server.rng = random.Random(args.seed)
+    server.verbose = args.verbose
+    print(f"Finnhub stand-in on http://{args.host}:{args.port}/api/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
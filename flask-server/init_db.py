@@ -5,6 +5,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.config import get_db_path
+from app.services import eod_store, portfolio_history, positions
 
 filename = get_db_path()
 
@@ -59,6 +60,23 @@ def init_db():
         )
     """)
 
+    # Materialized per-(user, ticker) positions, kept in step with
+    # `holdings` on every buy/sell. Built from the lots the first time
+    # the table appears.
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'positions'")
+    had_positions = cursor.fetchone() is not None
+    positions.ensure_schema(cursor)
+    if not had_positions:
+        positions.rebuild_all(cursor)
+        print("Migrated: built positions from holdings")
+
+    # End-of-day closes. Closes never change after the session, so
+    # they're stored once and read locally.
+    eod_store.ensure_schema(cursor)
+
+    # Nightly per-user valuation snapshots behind /portfolio/history.
+    portfolio_history.ensure_schema(cursor)
+
     print("Database initialized.")
     conn.commit()
     conn.close()
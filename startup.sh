@@ -23,13 +23,15 @@ python flask-server/init_db.py
 
 # Azure's front-door has a 230s idle timeout; keep gunicorn under that.
 # One worker is appropriate on F1/B1 — the FinBERT model is held in-process
-# and we'd OOM on a second copy.
+# and we'd OOM on a second copy. Each open SSE quote stream pins one of the
+# threads; SSE_MAX_STREAMS (default 4) keeps the rest free for the API.
 PORT="${PORT:-8000}"
+THREADS="${GUNICORN_THREADS:-8}"
 echo "[startup] Launching gunicorn on 0.0.0.0:${PORT}"
 exec gunicorn \
   --bind "0.0.0.0:${PORT}" \
   --workers 1 \
-  --threads 4 \
+  --threads "${THREADS}" \
   --worker-class gthread \
   --timeout 180 \
   --graceful-timeout 30 \